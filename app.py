@@ -6,7 +6,7 @@ import plotly.graph_objects as go
 from datetime import datetime
 
 # Import page modules
-from modules import tong_quan, tong_quan_hien_tai, chat_luong_du_lieu, khoa_hoc, gioi_thieu, ket_qua_phan_tich_du_doan
+from modules import tong_quan, tong_quan_hien_tai, chat_luong_du_lieu, khoa_hoc, truong_hoc, gioi_thieu, ket_qua_phan_tich_du_doan, tim_kiem
 from modules.styles import get_main_css, get_header_css
 from modules.theme_system import get_dynamic_css, get_theme_colors
 
@@ -66,7 +66,7 @@ course_id_param = query_params.get("course_id", None)
 user_id_param = query_params.get("user_id", None)
 view_param = query_params.get("view", None)
 
-if course_id_param and current_page_param not in ["intro", "prediction_results"]:
+if course_id_param and current_page_param not in ["intro", "prediction_results", "search"]:
     # Sync selected_course_id from URL
     if st.session_state.selected_course_id != course_id_param:
         st.session_state.selected_course_id = str(course_id_param)
@@ -156,13 +156,43 @@ with st.sidebar:
     </style>
     """, unsafe_allow_html=True)
 
-    # If page=intro or prediction_results -> sidebar state none
-    if current_page_param in ["intro", "prediction_results"]:
+    # If page=intro, prediction_results or search -> sidebar state none
+    if current_page_param in ["intro", "prediction_results", "search"]:
         st.session_state.main_selected_tab = None
 
+    def on_global_search():
+        q = st.session_state.get("global_search_q", "").strip()
+        if not q:
+            return
+        st.query_params["page"] = "search"
+        st.query_params["q"] = q
+        st.session_state.selected_course_id = None
+        st.session_state.current_view = "dashboard"
+        st.session_state.current_user_id = None
+        for k in ["course_id", "user_id", "view"]:
+            try:
+                if k in st.query_params:
+                    del st.query_params[k]
+            except Exception:
+                pass
+
+    # Ô tìm kiếm toàn cục: khóa học, trường, học viên
+    st.session_state.setdefault("global_search_q", query_params.get("q", ""))
+    st.text_input(
+        "Tìm kiếm",
+        placeholder="🔎 Khóa học, trường, học viên...",
+        label_visibility="collapsed",
+        key="global_search_q",
+        on_change=on_global_search,
+    )
+
     def on_sidebar_change():
         # Khi đổi tab sidebar -> quay lại dashboard
         st.query_params["page"] = "dashboard"
+        if "q" in st.query_params:
+            try:
+                del st.query_params["q"]
+            except Exception: pass
 
         # Luôn reset Giai đoạn về 1 khi đổi tab chính
         if "phase" in st.query_params:
@@ -188,7 +218,7 @@ with st.sidebar:
 
     selected_tab = st.radio(
         "Navigation",
-        ["📊 Tổng quan", "📊 Tổng quan hiện tại", "📈 Chất lượng dữ liệu", "📚 Khóa học"],
+        ["📊 Tổng quan", "📊 Tổng quan hiện tại", "📈 Chất lượng dữ liệu", "📚 Khóa học", "🏫 Trường học"],
         label_visibility="collapsed",
         key="main_selected_tab",
         on_change=on_sidebar_change
@@ -437,6 +467,9 @@ if current_page_param == "intro":
 elif current_page_param == "prediction_results":
     ket_qua_phan_tich_du_doan.show(st.session_state.theme)
 
+elif current_page_param == "search":
+    tim_kiem.show(df_courses, st.session_state.theme)
+
 else:
     current_tab = st.session_state.main_selected_tab if st.session_state.main_selected_tab else "📊 Tổng quan"
 
@@ -455,3 +488,6 @@ else:
 
     elif current_tab == "📚 Khóa học":
         khoa_hoc.show(df_courses, st.session_state.theme)
+
+    elif current_tab == "🏫 Trường học":
+        truong_hoc.show(st.session_state.theme)
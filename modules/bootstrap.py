@@ -0,0 +1,137 @@
+"""
+Vectorized bootstrap confidence intervals for the model metrics.
+Resamples are drawn as index matrices in batches (stratified per course when grouped),
+turned into per-row weights, and all metrics of a batch are computed with array ops.
+"""
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from modules.data_loader import load_prediction_file
+from modules.model_metrics import METRIC_KEYS, grouped_metrics
+
+N_BOOT = 500
+TIME_BUDGET_S = 2.0  # per prediction file
+MAX_BATCH_ELEMS = 4_000_000  # rows x resamples held in memory per batch
+CI_LEVEL = 0.95
+
+
+def _prepare(codes, label, predict, score):
+    """Sort rows by (group, score) once; everything else is reduceat over this layout."""
+    codes = np.asarray(codes, dtype=np.int64)
+    score = np.asarray(predict if score is None else score, dtype=np.float64)
+    order = np.lexsort((score, codes))
+    codes, score = codes[order], score[order]
+    label = np.asarray(label, dtype=np.int64)[order]
+    predict = np.asarray(predict, dtype=np.int64)[order]
+
+    n_groups = int(codes.max()) + 1
+    sizes = np.bincount(codes, minlength=n_groups)
+    tie_start = np.flatnonzero(np.r_[True, (codes[1:] != codes[:-1]) | (score[1:] != score[:-1])])
+    tie_group = codes[tie_start]
+    return {
+        "n": len(codes),
+        "n_groups": n_groups,
+        "codes": codes,
+        "label": label,
+        "key": label * 2 + predict,
+        "sizes": sizes,
+        "starts": np.r_[0, np.cumsum(sizes)[:-1]],
+        "tie_start": tie_start,
+        "tie_group": tie_group,
+        "first_tie": np.searchsorted(tie_group, np.arange(n_groups)),
+    }
+
+
+def _weighted_metrics(w: np.ndarray, prep: dict) -> dict:
+    """acc/prec/rec/f1/auc per (resample, group) for a (b, n) row-weight matrix."""
+    b, n_groups = w.shape[0], prep["n_groups"]
+    cm = np.stack([np.add.reduceat(w * (prep["key"] == k), prep["starts"], axis=1) for k in range(4)], axis=-1)
+    m = grouped_metrics(cm.reshape(-1, 4))
+    out = {k: m[k].reshape(b, n_groups) for k in ("acc", "prec", "rec", "f1")}
+
+    # Weighted Mann-Whitney AUC: positives x negatives scored strictly lower (+ half the ties)
+    label, tie_start, first_tie = prep["label"], prep["tie_start"], prep["first_tie"]
+    pos = np.add.reduceat(w * label, tie_start, axis=1).astype(np.float64)
+    neg = np.add.reduceat(w * (1 - label), tie_start, axis=1).astype(np.float64)
+    cum_neg = np.cumsum(neg, axis=1)
+    base = cum_neg[:, first_tie] - neg[:, first_tie]
+    below = cum_neg - neg - base[:, prep["tie_group"]]
+    num = np.add.reduceat(pos * (below + 0.5 * neg), first_tie, axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out["auc"] = num / (np.add.reduceat(pos, first_tie, axis=1) * np.add.reduceat(neg, first_tie, axis=1))
+    return out
+
+
+def bootstrap_metrics(codes, label, predict, score=None, n_boot=N_BOOT, time_budget=TIME_BUDGET_S, seed=0):
+    """
+    Point estimates and bootstrap distribution of every metric per group code.
+    Each resample redraws rows within their own group. Stops after ``n_boot`` resamples
+    or once ``time_budget`` seconds are spent (at least one batch always runs).
+    Returns (point {metric: (n_groups,)}, boots {metric: (n_done, n_groups)}, n_done).
+    """
+    prep = _prepare(codes, label, predict, score)
+    n = prep["n"]
+    point = {k: v[0] for k, v in _weighted_metrics(np.ones((1, n), dtype=np.int64), prep).items()}
+
+    row_start = prep["starts"][prep["codes"]]
+    row_size = prep["sizes"][prep["codes"]]
+    rng = np.random.default_rng(seed)
+    boots = {k: [] for k in METRIC_KEYS}
+    done, t0 = 0, time.perf_counter()
+    while done < n_boot:
+        b = int(max(1, min(n_boot - done, MAX_BATCH_ELEMS // n)))
+        # index matrix: row j of resample r is drawn uniformly from j's own group
+        idx = row_start + (rng.random((b, n)) * row_size).astype(np.int64)
+        np.minimum(idx, row_start + row_size - 1, out=idx)
+        idx += np.arange(b)[:, None] * n
+        w = np.bincount(idx.ravel(), minlength=b * n).reshape(b, n)
+
+        for k, v in _weighted_metrics(w, prep).items():
+            boots[k].append(v)
+        done += b
+        if time.perf_counter() - t0 > time_budget:
+            break
+    return point, {k: np.concatenate(v, axis=0) for k, v in boots.items()}, done
+
+
+@st.cache_data(show_spinner=False)
+def file_bootstrap_ci(path: str, digest: str, by_course: bool = False, n_boot: int = N_BOOT,
+                      time_budget: float = TIME_BUDGET_S, level: float = CI_LEVEL) -> pd.DataFrame:
+    """
+    Point estimate + CI of every metric for one prediction file (per course if ``by_course``),
+    cached per content hash. Columns: group, n, n_boot, <metric>, <metric>_lo, <metric>_hi.
+    """
+    df_pred = load_prediction_file(path, digest)
+    if df_pred.empty:
+        return pd.DataFrame()
+    if by_course:
+        df_pred = df_pred[df_pred["course_id"].notna()]
+        if df_pred.empty:
+            return pd.DataFrame()
+        codes, groups = pd.factorize(df_pred["course_id"], sort=True)
+        groups = groups.astype(str)
+    else:
+        codes, groups = np.zeros(len(df_pred), dtype=np.int64), np.array(["Tất cả"])
+
+    point, boots, done = bootstrap_metrics(
+        codes,
+        df_pred["label"].to_numpy(),
+        df_pred["predict"].to_numpy(),
+        df_pred["score"].to_numpy() if "score" in df_pred.columns else None,
+        n_boot=n_boot,
+        time_budget=time_budget,
+    )
+
+    alpha = (1.0 - level) / 2.0 * 100
+    df_ci = pd.DataFrame({"group": groups, "n": np.bincount(codes, minlength=len(groups)), "n_boot": done})
+    with warnings.catch_warnings():
+        # all-NaN columns (e.g. a course without positives) just give NaN bounds
+        warnings.simplefilter("ignore", RuntimeWarning)
+        for k in METRIC_KEYS:
+            lo, hi = np.nanpercentile(boots[k], [alpha, 100 - alpha], axis=0)
+            df_ci[k], df_ci[f"{k}_lo"], df_ci[f"{k}_hi"] = point[k], lo, hi
+    return df_ci
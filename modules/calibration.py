@@ -0,0 +1,51 @@
+"""
+Calibration (reliability) metrics for scored predictions.
+Binning is one bincount pass per statistic, so millions of rows stay fast.
+"""
+import numpy as np
+import streamlit as st
+
+from modules.data_loader import load_prediction_file
+
+N_BINS = 10
+
+
+def calibration_bins(label, score, n_bins: int = N_BINS, strategy: str = "uniform") -> dict:
+    """
+    Reliability diagram data plus Brier score, ECE and MCE.
+    ``strategy`` is "uniform" (equal-width bins on [0, 1]) or "quantile" (equal-count bins).
+    """
+    label = np.asarray(label, dtype=np.float64)
+    score = np.clip(np.asarray(score, dtype=np.float64), 0.0, 1.0)
+    if strategy == "quantile":
+        edges = np.quantile(score, np.linspace(0.0, 1.0, n_bins + 1))
+        bins = np.searchsorted(edges[1:-1], score, side="right")
+    else:
+        edges = np.linspace(0.0, 1.0, n_bins + 1)
+        bins = np.minimum((score * n_bins).astype(np.int64), n_bins - 1)
+
+    count = np.bincount(bins, minlength=n_bins).astype(np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_score = np.bincount(bins, weights=score, minlength=n_bins) / count
+        frac_pos = np.bincount(bins, weights=label, minlength=n_bins) / count
+    gap = np.abs(frac_pos - mean_score)
+    filled = count > 0
+    n = len(label)
+    return {
+        "edges": edges,
+        "count": count.astype(np.int64),
+        "mean_score": mean_score,
+        "frac_pos": frac_pos,
+        "brier": float(np.mean((score - label) ** 2)) if n else float("nan"),
+        "ece": float(np.sum(count[filled] / n * gap[filled])) if n else float("nan"),
+        "mce": float(gap[filled].max()) if filled.any() else float("nan"),
+    }
+
+
+@st.cache_data(show_spinner=False)
+def file_calibration(path: str, digest: str, n_bins: int = N_BINS, strategy: str = "uniform"):
+    """calibration_bins() of one prediction file, cached per content hash; None without scores."""
+    df_pred = load_prediction_file(path, digest)
+    if "score" not in df_pred.columns:
+        return None
+    return calibration_bins(df_pred["label"].to_numpy(), df_pred["score"].to_numpy(), n_bins, strategy)
@@ -0,0 +1,32 @@
+"""
+Enrollment cohort retention grid.
+Cohorts are enroll months of the training table (enroll_time, else start_year /
+start_month); retention in phase i is the share of the cohort with activity in that
+phase. The grid is one roll-up of the learner cube by month, so filtering by school or
+course is a different ``where`` over the same cells, never a pass over raw rows.
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from modules.olap_cube import ACTIVE_COLS, query
+from modules.phase_store import PHASES
+
+
+@st.cache_data(show_spinner=False)
+def retention_matrix(_cube, version: str, school: str = None, course: str = None) -> pd.DataFrame:
+    """
+    One row per cohort ("YYYY-MM", unknown months dropped): ``size`` and the retention
+    ``P1``..``P5`` (0-1) of the training learners, optionally within one school / course.
+    """
+    where = {"phase": 0}
+    if school is not None:
+        where["school"] = school
+    if course is not None:
+        where["course"] = course
+    df = query(_cube, by=["month"], where=where, measures=ACTIVE_COLS)
+    df = df[df["month"] != "N/A"]
+    out = pd.DataFrame({"cohort": df["month"].to_numpy(), "size": df["count"].to_numpy()})
+    for p, col in zip(PHASES, ACTIVE_COLS):
+        out[f"P{p}"] = df[col].to_numpy() / np.maximum(out["size"].to_numpy(), 1)
+    return out.reset_index(drop=True)
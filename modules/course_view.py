@@ -1,8 +1,16 @@
+import numpy as np
 import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from modules.data_loader import load_users
+from urllib.parse import quote
+from modules.olap_cube import cube_version, learner_cube, query
+from modules.phase_transitions import TRANSITION_COLS, alignment_version, flips, phase_alignment, transitions
+from modules.funnel import STAGES, engagement_funnel
+from modules.survival import course_survival, show_survival_chart
+
+_TRANSITION_TITLES = {"predict": "Dự đoán (predict)", "label": "Nhãn thực tế (label)"}
+
 
 def _theme_tokens():
     theme = st.session_state.get("theme", "Light")
@@ -131,21 +139,28 @@ def display_course_dashboard(course, COURSE_ID):
         else:
             st.info("Không có dữ liệu phân phối điểm cho khóa học này.")
 
-    # Load user data once for all charts
+    video_cols = [f"num_events_P{i}" for i in range(1, 6)]
+    attempt_cols = [f"n_attempts_P{i}" for i in range(1, 6)]
+
+    # Số liệu của khóa học lấy từ cube (giai đoạn 5), không quét lại bảng học viên
     try:
-        df_users = load_users()
-        course_users = df_users[df_users["course_id"] == COURSE_ID]
+        cube = learner_cube(cube_version())
+        course_where = {"phase": 5, "course": str(COURSE_ID)}
+        course_totals = query(cube, where=course_where, measures=video_cols + attempt_cols).iloc[0]
+        predict_counts = query(cube, by=["predict"], where={**course_where, "predict": ["0", "1"]})
     except Exception as e:
         st.error(f"Lỗi khi load dữ liệu người dùng: {e}")
-        course_users = pd.DataFrame()
+        course_totals, predict_counts = pd.Series({"count": 0}), pd.DataFrame()
+    n_course_users = int(course_totals["count"])
 
     with col_right:
         st.header("Dự đoán tỉ lệ bỏ học trong toàn khóa")
 
-        if not course_users.empty and "predict" in course_users.columns:
-            dropout_counts = course_users["predict"].value_counts().reset_index()
-            dropout_counts.columns = ["Trạng thái", "Số lượng"]
-            dropout_counts["Trạng thái"] = dropout_counts["Trạng thái"].map({0: "Không bỏ học", 1: "Bỏ học"})
+        if not predict_counts.empty:
+            dropout_counts = pd.DataFrame({
+                "Trạng thái": predict_counts["predict"].map({"0": "Không bỏ học", "1": "Bỏ học"}),
+                "Số lượng": predict_counts["count"],
+            })
 
             fig_dropout = px.pie(dropout_counts, values="Số lượng", names="Trạng thái", title="Tỷ lệ bỏ học (Dropout Rate)", hole=0.3)
             fig_dropout.update_traces(textposition="inside", textinfo="percent+label", textfont=dict(size=20, weight="bold"))
@@ -165,12 +180,9 @@ def display_course_dashboard(course, COURSE_ID):
     st.markdown("---")
     st.header("Hành vi học tập tích lũy theo thời gian")
 
-    video_cols = [f"num_events_P{i}" for i in range(1, 6)]
-    attempt_cols = [f"n_attempts_P{i}" for i in range(1, 6)]
-
-    if not course_users.empty:
-        video_cum = course_users[video_cols].sum()
-        attempt_cum = course_users[attempt_cols].sum()
+    if n_course_users:
+        video_cum = course_totals[video_cols].astype(float)
+        attempt_cum = course_totals[attempt_cols].astype(float)
 
         start_date = pd.to_datetime(course.get("class_start", None))
         end_date = pd.to_datetime(course.get("class_end", None))
@@ -224,3 +236,157 @@ def display_course_dashboard(course, COURSE_ID):
         st.plotly_chart(fig_inc, use_container_width=True, theme=None)
     else:
         st.info("Không có dữ liệu hành vi học tập cho khóa học này.")
+
+    _show_phase_transitions(COURSE_ID, tok)
+    _show_survival(COURSE_ID, tok)
+    _show_funnel(COURSE_ID, tok)
+
+
+def _show_phase_transitions(COURSE_ID, tok):
+    # =======================
+    # 5. CHUYỂN ĐỔI GIỮA CÁC GIAI ĐOẠN
+    # =======================
+    st.markdown("---")
+    st.header("Thay đổi dự đoán giữa các giai đoạn")
+
+    align = phase_alignment(alignment_version())
+    course_code = np.flatnonzero(align["courses"] == str(COURSE_ID))
+    pairs = list(zip(align["phases"][:-1], align["phases"][1:]))
+    if not len(course_code) or not pairs:
+        st.info("Không có dữ liệu dự đoán theo giai đoạn cho khóa học này.")
+        return
+    course_code = int(course_code[0])
+
+    # Tóm tắt: số học viên đổi dự đoán ở mỗi cặp giai đoạn liên tiếp
+    summary = []
+    for a, b in pairs:
+        m = transitions(align, a, b, "predict")[course_code]
+        summary.append({"Giai đoạn": f"P{a} → P{b}", "0 → 1": int(m[0, 1]), "1 → 0": int(m[1, 0]), "Không đổi": int(m[0, 0] + m[1, 1])})
+    st.dataframe(pd.DataFrame(summary), use_container_width=True, hide_index=True)
+
+    a, b = st.selectbox("Cặp giai đoạn", pairs, format_func=lambda ab: f"Giai đoạn {ab[0]} → {ab[1]}", key="transition_pair")
+    cols = st.columns(len(TRANSITION_COLS))
+    for col, name in zip(cols, TRANSITION_COLS):
+        m = transitions(align, a, b, name)[course_code]
+        with col:
+            if not m.sum():
+                st.info(f"Không có cột '{name}' ở cả hai giai đoạn.")
+                continue
+            fig = go.Figure(go.Heatmap(
+                z=m,
+                x=[f"P{b} = 0", f"P{b} = 1"],
+                y=[f"P{a} = 0", f"P{a} = 1"],
+                text=m,
+                texttemplate="%{text:,}",
+                colorscale="Blues",
+                showscale=False,
+            ))
+            fig.update_layout(
+                title=dict(text=f"<b>{_TRANSITION_TITLES[name]}</b>", font=dict(size=20, color=tok["text"])),
+                paper_bgcolor=tok["bg"],
+                plot_bgcolor=tok["bg"],
+                font=dict(color=tok["text"], size=16),
+                yaxis=dict(autorange="reversed"),
+                height=320,
+                margin=dict(l=20, r=20, t=60, b=20),
+            )
+            st.plotly_chart(fig, use_container_width=True, theme=None)
+
+    df_flips = flips(align, a, b, course_code)
+    if df_flips.empty:
+        st.info(f"Không có học viên nào đổi dự đoán từ giai đoạn {a} sang {b}.")
+        return
+    theme = st.session_state.get("theme", "Light")
+    df_flips = df_flips.assign(
+        link=[f"?page=dashboard&course_id={quote(str(c))}&user_id={quote(str(u))}&theme={theme}" for u, c in zip(df_flips["user_id"], df_flips["course_id"])],
+        change=np.where(df_flips["to"] == 1, "0 → 1 (nguy cơ tăng)", "1 → 0 (nguy cơ giảm)"),
+    ).sort_values("to", ascending=False, kind="stable")
+    st.dataframe(
+        df_flips[["link", "change"]],
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "link": st.column_config.LinkColumn("Học viên", display_text=r"user_id=([^&]+)"),
+            "change": "Thay đổi dự đoán",
+        },
+    )
+    st.caption(f"{len(df_flips):,} học viên đổi dự đoán từ giai đoạn {a} sang {b}.")
+
+
+def _show_survival(COURSE_ID, tok):
+    # =======================
+    # 6. ĐƯỜNG CONG DUY TRÌ (KAPLAN–MEIER)
+    # =======================
+    st.markdown("---")
+    st.header("Tỷ lệ học viên còn theo học qua các giai đoạn")
+
+    curves = course_survival(alignment_version())
+    code = np.flatnonzero(curves["labels"] == str(COURSE_ID))
+    if not len(code):
+        st.info("Không có nhãn theo giai đoạn cho khóa học này.")
+        return
+    code = int(code[0])
+
+    others = [c for c in curves["labels"] if c != str(COURSE_ID)]
+    compare = st.multiselect("So sánh với khóa học khác", others, key="survival_compare", max_selections=8)
+    lookup = {c: i for i, c in enumerate(curves["labels"])}
+    overall = curves["overall"]
+    lines = [(str(COURSE_ID), curves["survival"][code], curves["at_risk"][code], False)]
+    lines += [(c, curves["survival"][lookup[c]], curves["at_risk"][lookup[c]], False) for c in compare]
+    lines.append((overall["labels"][0], overall["survival"][0], overall["at_risk"][0], True))
+    show_survival_chart(lines, "Đường cong duy trì (Kaplan–Meier) theo nhãn từng giai đoạn", tok)
+    st.caption("Học viên rời khỏi đường cong ở giai đoạn đầu tiên có nhãn bỏ học; học viên không còn dữ liệu được tính đến giai đoạn cuối cùng quan sát được.")
+
+
+def _show_funnel(COURSE_ID, tok):
+    # =======================
+    # 7. PHỄU THAM GIA
+    # =======================
+    st.markdown("---")
+    st.header("Phễu tham gia: đăng ký → video → bài tập → bình luận")
+
+    funnel = engagement_funnel(alignment_version())
+    code = np.flatnonzero(funnel["courses"] == str(COURSE_ID))
+    if not len(code) or not funnel["phases"]:
+        st.info("Không có dữ liệu hoạt động theo giai đoạn cho khóa học này.")
+        return
+    code = int(code[0])
+
+    phase = st.radio("Giai đoạn", funnel["phases"], format_func=lambda p: f"Giai đoạn {p}", key="funnel_phase", horizontal=True)
+    i = funnel["phases"].index(phase)
+    reach = funnel["reach"][i, code]
+    overall = funnel["reach"][i].sum(axis=0)
+    stage_labels = [label for label, _ in STAGES]
+
+    col_chart, col_table = st.columns([3, 2])
+    with col_chart:
+        fig = go.Figure(go.Funnel(
+            y=stage_labels,
+            x=reach,
+            textinfo="value+percent initial+percent previous",
+            marker=dict(color=["#4299e1", "#48bb78", "#ed8936", "#9f7aea"]),
+        ))
+        fig.update_layout(
+            paper_bgcolor=tok["bg"],
+            plot_bgcolor=tok["bg"],
+            font=dict(color=tok["text"], size=16),
+            height=380,
+            margin=dict(l=20, r=20, t=20, b=20),
+        )
+        st.plotly_chart(fig, use_container_width=True, theme=None)
+    with col_table:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            st.dataframe(
+                pd.DataFrame({
+                    "Bước": stage_labels,
+                    "Khóa học": reach / reach[0] if reach[0] else np.nan,
+                    "Tất cả khóa học": overall / overall[0] if overall[0] else np.nan,
+                }),
+                use_container_width=True,
+                hide_index=True,
+                column_config={
+                    "Khóa học": st.column_config.ProgressColumn("Khóa học", min_value=0.0, max_value=1.0, format="%.2f"),
+                    "Tất cả khóa học": st.column_config.ProgressColumn("Tất cả khóa học", min_value=0.0, max_value=1.0, format="%.2f"),
+                },
+            )
+        st.caption("Tỷ lệ so với số học viên đăng ký; các bước lồng nhau (đạt bước sau phải đạt cả các bước trước).")
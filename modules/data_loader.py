@@ -1,8 +1,21 @@
+import hashlib
+import os
+import re
+
 import streamlit as st
 import pandas as pd
 
+COURSES_PATH = "data/course_info_final_P5.csv"
+USERS_PATH = "data/test_P5_pred.csv"
+PHASE_PATH = "data/test_P{phase}_pred.csv"
+TRAIN_PATH = "data/train_validate.csv"
+
+# Per-model prediction files: data/predictions/<model>/test_P{phase}_pred.csv
+PREDICTIONS_DIR = "data/predictions"
+_PHASE_FILE_RE = re.compile(r"^test_P([1-5])_pred\.csv$")
+
 @st.cache_data(ttl=3600)
-def load_users(path: str = "data/test_P5_pred.csv") -> pd.DataFrame:
+def load_users(path: str = USERS_PATH) -> pd.DataFrame:
     """Load user activity data from CSV."""
     try:
         return pd.read_csv(path)
@@ -11,7 +24,7 @@ def load_users(path: str = "data/test_P5_pred.csv") -> pd.DataFrame:
         return pd.DataFrame()
 
 @st.cache_data(ttl=3600)
-def load_courses(path: str = 'data/course_info_final_P5.csv') -> pd.DataFrame:
+def load_courses(path: str = COURSES_PATH) -> pd.DataFrame:
     """Load course metadata from CSV."""
     try:
         df_local = pd.read_csv(path)
@@ -31,7 +44,7 @@ def load_courses(path: str = 'data/course_info_final_P5.csv') -> pd.DataFrame:
         return pd.DataFrame()
 
 @st.cache_data(ttl=3600)
-def load_train_data(path: str = 'data/train_validate.csv') -> pd.DataFrame:
+def load_train_data(path: str = TRAIN_PATH) -> pd.DataFrame:
     """Load training/validation data."""
     try:
         return pd.read_csv(path)
@@ -43,7 +56,7 @@ def load_train_data(path: str = 'data/train_validate.csv') -> pd.DataFrame:
 @st.cache_data(ttl=3600)
 def load_test_predictions(phase: int) -> pd.DataFrame:
     """Load prediction data for a specific phase (1-5)."""
-    path = f"data/test_P{phase}_pred.csv"
+    path = PHASE_PATH.format(phase=phase)
     try:
         return pd.read_csv(path)
     except FileNotFoundError:
@@ -52,3 +65,60 @@ def load_test_predictions(phase: int) -> pd.DataFrame:
     except Exception as e:
         st.error(f"Lỗi khi load dữ liệu giai đoạn {phase}: {e}")
         return pd.DataFrame(columns=['user_id', 'course_id', 'label', 'predict'])
+
+
+# Mỗi (mtime, size) mới của một file là một mục cache -> giới hạn số mục
+@st.cache_data(max_entries=256, show_spinner=False)
+def _hash_file(path: str, mtime_ns: int, size: int) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def file_digest(path: str) -> str:
+    """Content hash of a file; only re-read when its mtime or size changes."""
+    stat = os.stat(path)
+    return _hash_file(path, stat.st_mtime_ns, stat.st_size)
+
+
+def dataset_version(*paths: str) -> str:
+    """Version key for cached indexes/aggregates built from the given data files."""
+    parts = []
+    for path in paths:
+        try:
+            parts.append(file_digest(path))
+        except FileNotFoundError:
+            parts.append("missing")
+    return "-".join(parts)
+
+
+def discover_prediction_files(root: str = PREDICTIONS_DIR) -> tuple:
+    """List (model, phase, path, digest) for every prediction file under ``root``."""
+    if not os.path.isdir(root):
+        return ()
+    found = []
+    for model in sorted(os.listdir(root)):
+        model_dir = os.path.join(root, model)
+        if not os.path.isdir(model_dir):
+            continue
+        for name in sorted(os.listdir(model_dir)):
+            m = _PHASE_FILE_RE.match(name)
+            if m:
+                path = os.path.join(model_dir, name)
+                found.append((model, int(m.group(1)), path, file_digest(path)))
+    return tuple(found)
+
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def load_prediction_file(path: str, digest: str) -> pd.DataFrame:
+    """Load one prediction file (shared, read-only) keyed by its content hash."""
+    df_pred = pd.read_csv(path)
+    for col in ("score", "proba", "predict_proba", "prob"):
+        if col in df_pred.columns:
+            df_pred = df_pred.rename(columns={col: "score"})
+            break
+    keep = [c for c in ("user_id", "course_id", "label", "predict", "score") if c in df_pred.columns]
+    return df_pred[keep]
+
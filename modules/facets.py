@@ -0,0 +1,87 @@
+"""
+Facet codes for the course catalog.
+Every facet is an integer code array aligned with the catalog rows, built once per
+catalog version; filtering is boolean masks and every live count is one bincount.
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Ngưỡng nhóm số học viên: [0, 100), [100, 500), ...
+USER_COUNT_BINS = (0, 100, 500, 1000, 2000, 5000, np.inf)
+
+
+def _bucket_labels(bins) -> list:
+    labels = []
+    for lo, hi in zip(bins[:-1], bins[1:]):
+        labels.append(f"≥ {lo:,.0f}".replace(",", ".") if np.isinf(hi) else f"{lo:,.0f} – {hi - 1:,.0f}".replace(",", "."))
+    return labels
+
+
+def day_numbers(values) -> np.ndarray:
+    """MM/DD/YYYY strings -> days since epoch (NaT -> min int64)."""
+    days = pd.to_datetime(pd.Series(values), format="%m/%d/%Y", errors="coerce")
+    return days.to_numpy(dtype="datetime64[D]").astype(np.int64)
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def course_facets(_df, version: str) -> dict:
+    """
+    {facet: {"codes", "labels"}} for the categorical facets (school, certificate,
+    user_count bucket) plus day-number arrays for class_start / class_end.
+    Categorical labels are ordered by frequency (most courses first).
+    """
+    out = {}
+    school = _df["school_name"].fillna("N/A").astype(str) if "school_name" in _df.columns else pd.Series("N/A", index=_df.index)
+    counts = school.value_counts()
+    out["school"] = {"codes": pd.Categorical(school, categories=counts.index).codes.astype(np.int64), "labels": counts.index.tolist()}
+
+    if "certificate" in _df.columns:
+        cert = pd.to_numeric(_df["certificate"], errors="coerce").fillna(0).to_numpy() > 0
+        out["certificate"] = {"codes": cert.astype(np.int64), "labels": ["Không có chứng chỉ", "Có chứng chỉ"]}
+
+    users = pd.to_numeric(_df["user_count"], errors="coerce").fillna(0).to_numpy()
+    out["user_count"] = {
+        "codes": np.searchsorted(np.asarray(USER_COUNT_BINS[1:-1]), users, side="right").astype(np.int64),
+        "labels": _bucket_labels(USER_COUNT_BINS),
+    }
+
+    out["class_start"] = day_numbers(_df["class_start"])
+    out["class_end"] = day_numbers(_df["class_end"])
+    return out
+
+
+def facet_masks(facets: dict, selection: dict) -> dict:
+    """
+    One boolean mask per active filter. ``selection`` maps categorical facets to a list
+    of selected codes and "class_start"/"class_end" to (first_day, last_day) numbers.
+    """
+    masks = {}
+    for name, value in selection.items():
+        if name in ("class_start", "class_end"):
+            if value is not None:
+                days = facets[name]
+                masks[name] = (days >= value[0]) & (days <= value[1])
+        elif value:
+            keep = np.zeros(len(facets[name]["labels"]), dtype=bool)
+            keep[list(value)] = True
+            masks[name] = keep[facets[name]["codes"]]
+    return masks
+
+
+def combine(masks: dict, n: int, exclude: str = None) -> np.ndarray:
+    """AND of every mask except ``exclude`` (all-True when there is none)."""
+    out = np.ones(n, dtype=bool)
+    for name, mask in masks.items():
+        if name != exclude:
+            out &= mask
+    return out
+
+
+def facet_counts(facets: dict, masks: dict, name: str) -> np.ndarray:
+    """
+    Live counts of a categorical facet under every *other* active filter, so the
+    options of a facet stay selectable while it is itself filtered.
+    """
+    codes = facets[name]["codes"]
+    return np.bincount(codes[combine(masks, len(codes), exclude=name)], minlength=len(facets[name]["labels"]))
@@ -0,0 +1,52 @@
+"""
+Engagement funnel per course and phase: enrolled -> watched video -> attempted a
+problem -> commented. Stages are nested (a learner reaches "commented" only if they
+also watched and attempted), so each row gets the number of stages it passed and all
+courses of all phases are counted with one bincount over (phase, course, stage).
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from modules.phase_store import phase_frame, phase_version
+from modules.phase_transitions import phase_alignment
+
+# (nhãn, tiền tố cột hoạt động của giai đoạn; None = mọi học viên đăng ký)
+STAGES = (
+    ("Đăng ký", None),
+    ("Xem video", "num_videos"),
+    ("Làm bài tập", "n_attempts"),
+    ("Bình luận", "n_comments"),
+)
+
+
+def funnel_stage(df: pd.DataFrame, phase: int) -> np.ndarray:
+    """Number of nested activity stages (beyond enrolled) each row passed in ``phase``."""
+    reached = np.ones(len(df), dtype=bool)
+    stage = np.zeros(len(df), dtype=np.int64)
+    for _, prefix in STAGES[1:]:
+        col = f"{prefix}_P{phase}"
+        active = pd.to_numeric(df[col], errors="coerce").fillna(0).to_numpy() > 0 if col in df.columns else np.zeros(len(df), dtype=bool)
+        reached &= active
+        stage += reached
+    return stage
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def engagement_funnel(version: str) -> dict:
+    """
+    {"phases", "courses", "reach" (phases, courses, stages)}: learners of each course
+    reaching each stage in each phase; course codes are those of phase_alignment().
+    """
+    align = phase_alignment(version)
+    phases, n_courses, n_stages = align["phases"], len(align["courses"]), len(STAGES)
+    cells = []
+    for i, phase in enumerate(phases):
+        stage = funnel_stage(phase_frame(phase, phase_version(phase)), phase)
+        course = align["course"][align["rows"][phase]]
+        cells.append((i * n_courses + course) * n_stages + stage)
+    counts = np.bincount(np.concatenate(cells), minlength=len(phases) * n_courses * n_stages)
+    counts = counts.reshape(len(phases), n_courses, n_stages)
+    # số học viên đạt tới bước k = số dừng ở bước >= k
+    reach = counts[..., ::-1].cumsum(axis=-1)[..., ::-1]
+    return {"phases": list(phases), "courses": align["courses"], "reach": reach}
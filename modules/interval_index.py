@@ -0,0 +1,84 @@
+"""
+Centered interval tree over [start, end] day numbers (inclusive), e.g. course runs.
+stab(t) lists the intervals containing t in O(log n + k); a window [a, b] overlaps an
+interval iff it contains a or starts inside (a, b], so window queries reuse stab() plus
+one searchsorted over the sorted starts. Counts need only the two sorted endpoint arrays.
+"""
+import numpy as np
+import streamlit as st
+
+from modules.facets import day_numbers
+
+_MISSING = np.iinfo(np.int64).min
+
+
+def _build_node(ids, start, end, nodes) -> int:
+    if not len(ids):
+        return -1
+    center = np.median(np.r_[start[ids], end[ids]])
+    left, right = ids[end[ids] < center], ids[start[ids] > center]
+    mid = ids[(end[ids] >= center) & (start[ids] <= center)]
+    by_start = mid[np.argsort(start[mid], kind="stable")]
+    by_end = mid[np.argsort(end[mid], kind="stable")]
+    node = {
+        "center": center,
+        "by_start": by_start, "starts": start[by_start],
+        "by_end": by_end, "ends": end[by_end],
+    }
+    nodes.append(node)
+    i = len(nodes) - 1
+    node["left"] = _build_node(left, start, end, nodes)
+    node["right"] = _build_node(right, start, end, nodes)
+    return i
+
+
+def build_interval_tree(start, end) -> dict:
+    """Tree over intervals i = [start[i], end[i]]; rows with a missing endpoint are skipped."""
+    start = np.asarray(start, dtype=np.int64)
+    end = np.asarray(end, dtype=np.int64)
+    ids = np.flatnonzero((start != _MISSING) & (end != _MISSING) & (end >= start))
+    nodes = []
+    root = _build_node(ids, start, end, nodes)
+    order = ids[np.argsort(start[ids], kind="stable")]
+    return {
+        "nodes": nodes,
+        "root": root,
+        "by_start": order,
+        "starts": start[order],
+        "ends": np.sort(end[ids]),
+        "n": len(start),
+    }
+
+
+def stab(tree: dict, t: int) -> np.ndarray:
+    """Ids of the intervals containing day ``t``."""
+    out, i = [], tree["root"]
+    while i >= 0:
+        node = tree["nodes"][i]
+        if t < node["center"]:
+            # every interval here ends after t: keep those already started
+            out.append(node["by_start"][:np.searchsorted(node["starts"], t, side="right")])
+            i = node["left"]
+        else:
+            # every interval here starts before t: keep those not yet ended
+            out.append(node["by_end"][np.searchsorted(node["ends"], t, side="left"):])
+            i = node["right"]
+    return np.concatenate(out) if out else np.empty(0, dtype=np.int64)
+
+
+def overlap(tree: dict, a: int, b: int) -> np.ndarray:
+    """Ids of the intervals intersecting the window [a, b]."""
+    lo, hi = np.searchsorted(tree["starts"], [a, b], side="right")
+    return np.concatenate([stab(tree, a), tree["by_start"][lo:hi]])
+
+
+def count_overlap(tree: dict, a: int, b: int = None) -> int:
+    """Number of intervals intersecting [a, b] (a single day if ``b`` is None), O(log n)."""
+    b = a if b is None else b
+    return int(np.searchsorted(tree["starts"], b, side="right") - np.searchsorted(tree["ends"], a, side="left"))
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def course_interval_index(_df, version: str) -> dict:
+    """Interval tree over the catalog's class_start / class_end, built once per version."""
+    return build_interval_tree(day_numbers(_df["class_start"]), day_numbers(_df["class_end"]))
@@ -1,7 +1,445 @@
 import streamlit as st
 import textwrap
+import pandas as pd
+import plotly.graph_objects as go
 import streamlit.components.v1 as components
+from urllib.parse import quote
 from modules.theme_system import get_theme_colors
+from modules.data_loader import discover_prediction_files, load_courses, PREDICTIONS_DIR
+from modules.model_metrics import (
+    compute_leaderboard,
+    model_params,
+    files_by_model,
+    has_scores,
+    file_curve,
+    confusion_at,
+    curve_points,
+    metrics_from_confusion,
+    course_breakdown,
+)
+from modules.bootstrap import file_bootstrap_ci, CI_LEVEL
+from modules.significance import pairwise_tests
+from modules.calibration import file_calibration
+
+
+# =========================
+# REFERENCE RESULTS (9 models) — hiển thị khi chưa có file dự đoán
+# =========================
+REFERENCE_RESULTS = [
+    {
+        "model": "RandomForest",
+        "params": [
+            "n_estimators: 500",
+            "min_samples_split: 10",
+            "min_samples_leaf: 4",
+            "max_depth: 20",
+            "bootstrap: False",
+        ],
+        "tests": [
+            {"acc": 0.8776, "prec": 0.9419, "rec": 0.9181, "f1": 0.9299, "auc": 0.8987},
+            {"acc": 0.8754, "prec": 0.9132, "rec": 0.9492, "f1": 0.9309, "auc": 0.8792},
+            {"acc": 0.8752, "prec": 0.9124, "rec": 0.9499, "f1": 0.9308, "auc": 0.8948},
+            {"acc": 0.9021, "prec": 0.9409, "rec": 0.9488, "f1": 0.9448, "auc": 0.9490},
+            {"acc": 0.9364, "prec": 0.9872, "rec": 0.9402, "f1": 0.9631, "auc": 0.9835},
+        ],
+        "avg": {"acc": 0.8933, "prec": 0.7320, "rec": 0.7340, "f1": 0.7320, "auc": 0.9210},
+    },
+    {
+        "model": "XGBoost",
+        "params": [
+            "learning_rate: 0.05",
+            "max_depth: 8",
+            "min_child_weight: 1",
+            "n_estimators: 500",
+            "subsample: 0.8",
+            "scaler: RobustScaler()",
+        ],
+        "tests": [
+            {"acc": 0.8819, "prec": 0.6974, "rec": 0.6081, "f1": 0.6333, "auc": 0.8087},
+            {"acc": 0.8764, "prec": 0.6814, "rec": 0.6198, "f1": 0.6408, "auc": 0.8148},
+            {"acc": 0.8755, "prec": 0.6862, "rec": 0.6464, "f1": 0.6625, "auc": 0.8663},
+            {"acc": 0.9234, "prec": 0.8071, "rec": 0.8491, "f1": 0.8261, "auc": 0.9630},
+            {"acc": 0.9352, "prec": 0.8240, "rec": 0.9286, "f1": 0.8652, "auc": 0.9844},
+        ],
+        "avg": {"acc": 0.8985, "prec": 0.7400, "rec": 0.7320, "f1": 0.7260, "auc": 0.8874},
+    },
+    {
+        "model": "ANN-LSTM",
+        "params": [],
+        "tests": [
+            {"acc": 0.7988, "prec": 0.9542, "rec": 0.8111, "f1": 0.8769, "auc": 0.8590},
+            {"acc": 0.8472, "prec": 0.9496, "rec": 0.8733, "f1": 0.9099, "auc": 0.8823},
+            {"acc": 0.8725, "prec": 0.9650, "rec": 0.8878, "f1": 0.9248, "auc": 0.9276},
+            {"acc": 0.9006, "prec": 0.9800, "rec": 0.9060, "f1": 0.9416, "auc": 0.9612},
+            {"acc": 0.9034, "prec": 0.9893, "rec": 0.9004, "f1": 0.9428, "auc": 0.9747},
+        ],
+        "avg": {"acc": 0.8645, "prec": 0.7140, "rec": 0.8260, "f1": 0.7480, "auc": 0.9210},
+    },
+    {
+        "model": "Linear SVM",
+        "params": [
+            "C: 1",
+            "class_weight: balanced",
+        ],
+        "tests": [
+            {"acc": 0.5809, "prec": 0.9520, "rec": 0.5535, "f1": 0.7000, "auc": 0.7241},
+            {"acc": 0.3164, "prec": 0.9620, "rec": 0.2354, "f1": 0.3783, "auc": 0.6769},
+            {"acc": 0.4482, "prec": 0.9260, "rec": 0.4080, "f1": 0.5664, "auc": 0.6657},
+            {"acc": 0.6291, "prec": 0.9441, "rec": 0.6166, "f1": 0.7460, "auc": 0.7170},
+            {"acc": 0.7468, "prec": 0.9587, "rec": 0.7455, "f1": 0.8387, "auc": 0.8287},
+        ],
+        "avg": {"acc": 0.5443, "prec": 0.5680, "rec": 0.6500, "f1": 0.4720, "auc": 0.7225},
+    },
+    {
+        "model": "LightGBM",
+        "params": [
+            "learning_rate: 0.05",
+            "max_depth: -1",
+            "n_estimators: 200",
+            "num_leaves: 63",
+        ],
+        "tests": [
+            {"acc": 0.8583, "prec": 0.9113, "rec": 0.9302, "f1": 0.9206, "auc": 0.8069},
+            {"acc": 0.8603, "prec": 0.9137, "rec": 0.9296, "f1": 0.9216, "auc": 0.8097},
+            {"acc": 0.8661, "prec": 0.9224, "rec": 0.9263, "f1": 0.9244, "auc": 0.8839},
+            {"acc": 0.9089, "prec": 0.9552, "rec": 0.9409, "f1": 0.9480, "auc": 0.9467},
+            {"acc": 0.9309, "prec": 0.9898, "rec": 0.9314, "f1": 0.9597, "auc": 0.9842},
+        ],
+        "avg": {"acc": 0.8849, "prec": 0.7120, "rec": 0.7300, "f1": 0.7180, "auc": 0.8863},
+    },
+    {
+        "model": "LSTM",
+        "params": [],
+        "tests": [
+            {"acc": 0.8764, "prec": 0.8863, "rec": 0.9867, "f1": 0.9338, "auc": 0.6060},
+            {"acc": 0.8821, "prec": 0.8934, "rec": 0.9839, "f1": 0.9365, "auc": 0.6776},
+            {"acc": 0.9034, "prec": 0.9279, "rec": 0.9657, "f1": 0.9464, "auc": 0.8149},
+            {"acc": 0.9174, "prec": 0.9559, "rec": 0.9503, "f1": 0.9531, "auc": 0.9075},
+            {"acc": 0.8883, "prec": 0.9713, "rec": 0.9001, "f1": 0.9343, "auc": 0.9333},
+        ],
+        "avg": {"acc": 0.8935, "prec": 0.7180, "rec": 0.6840, "f1": 0.6740, "auc": 0.7879},
+    },
+    {
+        "model": "CatBoost",
+        "params": [
+            "depth: 6",
+            "learning_rate: 0.05",
+        ],
+        "tests": [
+            {"acc": 0.8946, "prec": 0.8970, "rec": 0.9950, "f1": 0.9435, "auc": 0.8196},
+            {"acc": 0.8902, "prec": 0.8925, "rec": 0.9956, "f1": 0.9412, "auc": 0.7708},
+            {"acc": 0.8907, "prec": 0.8926, "rec": 0.9960, "f1": 0.9415, "auc": 0.8275},
+            {"acc": 0.9239, "prec": 0.9226, "rec": 0.9975, "f1": 0.9586, "auc": 0.9642},
+            {"acc": 0.9548, "prec": 0.9572, "rec": 0.9933, "f1": 0.9749, "auc": 0.9753},
+        ],
+        "avg": {"acc": 0.9108, "prec": 0.8710, "rec": 0.6326, "f1": 0.6621, "auc": 0.8715},
+    },
+    {
+        "model": "KNN",
+        "params": [],
+        "tests": [
+            {"acc": 0.8942, "prec": 0.9072, "rec": 0.9806, "f1": 0.9424, "auc": 0.8358},
+            {"acc": 0.8957, "prec": 0.9010, "rec": 0.9908, "f1": 0.9437, "auc": 0.7803},
+            {"acc": 0.9044, "prec": 0.9071, "rec": 0.9936, "f1": 0.9484, "auc": 0.8357},
+            {"acc": 0.9222, "prec": 0.9271, "rec": 0.9898, "f1": 0.9574, "auc": 0.9315},
+            {"acc": 0.9378, "prec": 0.9514, "rec": 0.9796, "f1": 0.9653, "auc": 0.9522},
+        ],
+        "avg": {"acc": 0.9109, "prec": 0.8396, "rec": 0.6610, "f1": 0.6994, "auc": 0.8671},
+    },
+    {
+        "model": "TabNet",
+        "params": [],
+        "tests": [
+            {"acc": 0.8881, "prec": 0.9306, "rec": 0.9437, "f1": 0.9371, "auc": 0.8812},
+            {"acc": 0.8978, "prec": 0.9195, "rec": 0.9692, "f1": 0.9437, "auc": 0.8788},
+            {"acc": 0.9238, "prec": 0.9420, "rec": 0.9737, "f1": 0.9576, "auc": 0.9261},
+            {"acc": 0.9376, "prec": 0.9479, "rec": 0.9834, "f1": 0.9653, "auc": 0.9423},
+            {"acc": 0.9540, "prec": 0.9627, "rec": 0.9861, "f1": 0.9743, "auc": 0.9735},
+        ],
+        "avg": {"acc": 0.9203, "prec": 0.8258, "rec": 0.7528, "f1": 0.7817, "auc": 0.9204},
+    },
+]
+
+MODEL_PARAMS = {m["model"]: m["params"] for m in REFERENCE_RESULTS}
+
+
+PHASE_COLORS = ["#4299e1", "#48bb78", "#ed8936", "#9f7aea", "#f56565"]
+
+
+def _style_fig(fig, colors, title, height=480):
+    fig.update_layout(
+        title=dict(text=f"<b>{title}</b>", font=dict(size=22, color=colors["chart_text"])),
+        paper_bgcolor=colors["chart_bg"],
+        plot_bgcolor=colors["chart_bg"],
+        font=dict(color=colors["chart_text"], size=16),
+        legend=dict(font=dict(color=colors["chart_text"], size=16)),
+        height=height,
+        margin=dict(l=60, r=20, t=70, b=60),
+    )
+    fig.update_xaxes(gridcolor=colors["chart_grid"])
+    fig.update_yaxes(gridcolor=colors["chart_grid"])
+    return fig
+
+
+def _show_threshold_section(manifest, colors):
+    """ROC/PR theo giai đoạn + slider ngưỡng (chỉ tra cứu trên đường cong đã cache)."""
+    by_model = files_by_model(manifest)
+    scored = [m for m, files in by_model.items() if any(has_scores(*f) for f in files.values())]
+
+    st.markdown("<h2 style='font-size: 32px; margin: 30px 0 10px;'>Ngưỡng quyết định & đường cong ROC / PR</h2>", unsafe_allow_html=True)
+    if not scored:
+        st.info("File dự đoán chưa có cột điểm (score/proba) — không thể vẽ ROC/PR.")
+        return
+
+    c1, c2 = st.columns([1, 2])
+    model = c1.selectbox("Mô hình", scored, key="threshold_model")
+    threshold = c2.slider("Ngưỡng quyết định (bỏ học nếu score ≥ ngưỡng)", 0.0, 1.0, 0.5, 0.01, key="threshold_value")
+    st.caption("Ghi chú Acc-DQ đề xuất thử ngưỡng 0.4 / 0.3 để giảm overconfidence.")
+
+    curves = {p: file_curve(*f) for p, f in sorted(by_model[model].items())}
+    curves = {p: c for p, c in curves.items() if c is not None}
+
+    rows = []
+    fig_roc, fig_pr = go.Figure(), go.Figure()
+    for p, curve in curves.items():
+        cm = confusion_at(curve, threshold)
+        pts = curve_points(curve)
+        m = metrics_from_confusion(cm)
+        rows.append({
+            "Giai đoạn": p, "TN": cm["tn"], "FP": cm["fp"], "FN": cm["fn"], "TP": cm["tp"],
+            "Accuracy": m["acc"], "Precision": m["prec"], "Recall": m["rec"], "F1-Score": m["f1"],
+            "ROC-AUC": pts["auc"], "PR-AP": pts["ap"],
+        })
+
+        color = PHASE_COLORS[(p - 1) % len(PHASE_COLORS)]
+        tpr = cm["tp"] / curve["pos"] if curve["pos"] else 0.0
+        fpr = cm["fp"] / curve["neg"] if curve["neg"] else 0.0
+        fig_roc.add_trace(go.Scatter(x=pts["fpr"], y=pts["tpr"], mode="lines", name=f"Giai đoạn {p}", line=dict(color=color, width=2)))
+        fig_roc.add_trace(go.Scatter(x=[fpr], y=[tpr], mode="markers", marker=dict(color=color, size=12), showlegend=False))
+        fig_pr.add_trace(go.Scatter(x=pts["recall"], y=pts["precision"], mode="lines", name=f"Giai đoạn {p}", line=dict(color=color, width=2)))
+        if m["prec"] == m["prec"]:
+            fig_pr.add_trace(go.Scatter(x=[m["rec"]], y=[m["prec"]], mode="markers", marker=dict(color=color, size=12), showlegend=False))
+
+    fig_roc.add_trace(go.Scatter(x=[0, 1], y=[0, 1], mode="lines", line=dict(dash="dash", color="#a0aec0"), showlegend=False))
+    fig_roc.update_layout(xaxis_title="False Positive Rate", yaxis_title="True Positive Rate")
+    fig_pr.update_layout(xaxis_title="Recall", yaxis_title="Precision")
+
+    st.dataframe(
+        pd.DataFrame(rows).style.format({k: "{:.4f}" for k in ["Accuracy", "Precision", "Recall", "F1-Score", "ROC-AUC", "PR-AP"]}),
+        hide_index=True,
+        use_container_width=True,
+    )
+    g1, g2 = st.columns(2)
+    g1.plotly_chart(_style_fig(fig_roc, colors, f"ROC — {model}"), use_container_width=True, theme=None)
+    g2.plotly_chart(_style_fig(fig_pr, colors, f"Precision-Recall — {model}"), use_container_width=True, theme=None)
+
+
+def _show_course_breakdown(manifest, theme):
+    """Bảng hiệu năng theo khóa học (sắp xếp được, link sang Course Dashboard)."""
+    by_model = files_by_model(manifest)
+
+    st.markdown("<h2 style='font-size: 32px; margin: 30px 0 10px;'>Hiệu năng mô hình theo khóa học</h2>", unsafe_allow_html=True)
+    c1, c2, c3 = st.columns([2, 1, 1])
+    model = c1.selectbox("Mô hình", list(by_model), key="course_breakdown_model")
+    phases = sorted(by_model[model])
+    phase = c2.selectbox("Giai đoạn", phases, index=len(phases) - 1, key="course_breakdown_phase")
+    min_n = c3.number_input("Số học viên tối thiểu", min_value=1, value=30, step=10, key="course_breakdown_min_n")
+
+    df_bd = course_breakdown(by_model[model])
+    df_bd = df_bd[(df_bd["phase"] == phase) & (df_bd["n"] >= min_n)]
+
+    df_courses = load_courses()
+    if "course_name" in df_courses.columns:
+        df_bd = df_bd.merge(df_courses[["course_id", "course_name"]], on="course_id", how="left")
+    else:
+        df_bd = df_bd.assign(course_name="")
+    df_bd = df_bd.sort_values("f1", ascending=True)
+    df_bd["link"] = "?page=dashboard&course_id=" + df_bd["course_id"].map(quote) + f"&theme={theme}"
+
+    st.caption(f"{len(df_bd):,} khóa học — mặc định xếp theo F1 tăng dần (khóa học mô hình dự đoán kém nhất ở trên).")
+    st.dataframe(
+        df_bd[["link", "course_name", "n", "label_rate", "predict_rate", "acc", "prec", "rec", "f1"]],
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            "link": st.column_config.LinkColumn("Mã khóa học", display_text=r"course_id=([^&]+)"),
+            "course_name": "Tên khóa học",
+            "n": st.column_config.NumberColumn("Số học viên", format="%d"),
+            "label_rate": st.column_config.NumberColumn("Tỷ lệ bỏ học thực tế", format="%.3f"),
+            "predict_rate": st.column_config.NumberColumn("Tỷ lệ dự đoán bỏ học", format="%.3f"),
+            "acc": st.column_config.NumberColumn("Accuracy", format="%.4f"),
+            "prec": st.column_config.NumberColumn("Precision", format="%.4f"),
+            "rec": st.column_config.NumberColumn("Recall", format="%.4f"),
+            "f1": st.column_config.NumberColumn("F1-Score", format="%.4f"),
+        },
+    )
+
+
+def _show_bootstrap_section(manifest, colors):
+    """Khoảng tin cậy bootstrap cho từng chỉ số theo giai đoạn và theo khóa học."""
+    by_model = files_by_model(manifest)
+    metric_labels = {"acc": "Accuracy", "prec": "Precision", "rec": "Recall", "f1": "F1-Score", "auc": "ROC-AUC"}
+    level_pct = int(CI_LEVEL * 100)
+
+    st.markdown(f"<h2 style='font-size: 32px; margin: 30px 0 10px;'>Khoảng tin cậy bootstrap ({level_pct}%)</h2>", unsafe_allow_html=True)
+    c1, c2 = st.columns([2, 1])
+    model = c1.selectbox("Mô hình", list(by_model), key="bootstrap_model")
+    metric = c2.selectbox("Chỉ số", list(metric_labels), format_func=lambda k: metric_labels[k], index=3, key="bootstrap_metric")
+
+    with st.spinner("Đang bootstrap..."):
+        phase_ci = {p: file_bootstrap_ci(*f) for p, f in sorted(by_model[model].items())}
+    phase_ci = {p: df_ci for p, df_ci in phase_ci.items() if not df_ci.empty}
+    if not phase_ci:
+        st.info("Không có dữ liệu dự đoán để bootstrap cho mô hình này.")
+        return
+
+    rows = []
+    for p, df_ci in phase_ci.items():
+        r = df_ci.iloc[0]
+        row = {"Giai đoạn": p, "Số mẫu bootstrap": int(r["n_boot"])}
+        for k, label in metric_labels.items():
+            row[label] = f"{r[k]:.4f} [{r[f'{k}_lo']:.4f}, {r[f'{k}_hi']:.4f}]"
+        rows.append(row)
+    st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+
+    phases = list(phase_ci)
+    point = [phase_ci[p].iloc[0][metric] for p in phases]
+    lo = [phase_ci[p].iloc[0][f"{metric}_lo"] for p in phases]
+    hi = [phase_ci[p].iloc[0][f"{metric}_hi"] for p in phases]
+    fig = go.Figure(go.Scatter(
+        x=[f"Giai đoạn {p}" for p in phases],
+        y=point,
+        mode="markers+lines",
+        marker=dict(size=12, color="#3182ce"),
+        error_y=dict(type="data", symmetric=False, array=[h - v for h, v in zip(hi, point)], arrayminus=[v - l for v, l in zip(point, lo)]),
+        name=metric_labels[metric],
+    ))
+    fig.update_layout(yaxis_title=metric_labels[metric])
+    st.plotly_chart(_style_fig(fig, colors, f"{metric_labels[metric]} theo giai đoạn ({level_pct}% CI) — {model}", height=420), use_container_width=True, theme=None)
+
+    phase = st.selectbox("Giai đoạn (theo khóa học)", phases, index=len(phases) - 1, key="bootstrap_course_phase")
+    with st.spinner("Đang bootstrap theo khóa học..."):
+        df_course = file_bootstrap_ci(*by_model[model][phase], by_course=True)
+    if df_course.empty:
+        st.info("Không có khóa học nào để bootstrap ở giai đoạn này.")
+        return
+    df_course = df_course.assign(width=df_course[f"{metric}_hi"] - df_course[f"{metric}_lo"])
+    df_course = df_course.sort_values("width", ascending=False)
+    st.caption("Khóa học ít học viên có khoảng tin cậy rộng — giá trị điểm của chúng không ổn định.")
+    st.dataframe(
+        df_course[["group", "n", metric, f"{metric}_lo", f"{metric}_hi", "width"]],
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            "group": "Mã khóa học",
+            "n": st.column_config.NumberColumn("Số học viên", format="%d"),
+            metric: st.column_config.NumberColumn(metric_labels[metric], format="%.4f"),
+            f"{metric}_lo": st.column_config.NumberColumn("Cận dưới", format="%.4f"),
+            f"{metric}_hi": st.column_config.NumberColumn("Cận trên", format="%.4f"),
+            "width": st.column_config.NumberColumn("Độ rộng CI", format="%.4f"),
+        },
+    )
+
+
+def _show_significance_section(manifest, colors):
+    """Ma trận p-value McNemar / DeLong giữa từng cặp mô hình."""
+    by_model = files_by_model(manifest)
+    if len(by_model) < 2:
+        return
+
+    st.markdown("<h2 style='font-size: 32px; margin: 30px 0 10px;'>Kiểm định khác biệt giữa các mô hình</h2>", unsafe_allow_html=True)
+    c1, c2 = st.columns([1, 2])
+    phases = sorted({p for files in by_model.values() for p in files})
+    phase = c1.selectbox("Giai đoạn", phases, index=len(phases) - 1, key="significance_phase")
+    test = c2.radio("Kiểm định", ["McNemar (dự đoán)", "DeLong (ROC-AUC)"], horizontal=True, key="significance_test")
+
+    files = tuple((m, *files[phase]) for m, files in by_model.items() if phase in files)
+    if len(files) < 2:
+        st.info(f"Cần ít nhất 2 mô hình có file giai đoạn {phase}.")
+        return
+    with st.spinner("Đang kiểm định..."):
+        res = pairwise_tests(files)
+
+    if test.startswith("McNemar"):
+        models, p = res["models"], res["mcnemar"]["p"]
+        acc = res["mcnemar"]["acc"]
+        diff = acc[:, None] - acc[None, :]
+        hover = "Δ Accuracy (hàng − cột): %{customdata:+.4f}"
+    else:
+        if res["delong"] is None:
+            st.info("Cần ít nhất 2 mô hình có cột điểm (score/proba) để kiểm định DeLong.")
+            return
+        models, p = res["delong"]["models"], res["delong"]["p"]
+        auc = res["delong"]["auc"]
+        diff = auc[:, None] - auc[None, :]
+        hover = "Δ ROC-AUC (hàng − cột): %{customdata:+.4f}"
+
+    text = [["" if i == j else f"{p[i, j]:.3g}" for j in range(len(models))] for i in range(len(models))]
+    fig = go.Figure(go.Heatmap(
+        z=p,
+        x=models,
+        y=models,
+        text=text,
+        texttemplate="%{text}",
+        customdata=diff,
+        hovertemplate="<b>%{y}</b> vs <b>%{x}</b><br>p-value: %{z:.4g}<br>" + hover + "<extra></extra>",
+        colorscale=[[0.0, "#2f855a"], [0.05, "#9ae6b4"], [0.0501, "#fed7d7"], [1.0, "#e53e3e"]],
+        zmin=0,
+        zmax=1,
+        colorbar=dict(title="p-value"),
+    ))
+    fig.update_layout(yaxis=dict(autorange="reversed"))
+    st.plotly_chart(
+        _style_fig(fig, colors, f"{test} — Giai đoạn {phase} ({res['n']:,} học viên chung)", height=120 + 60 * len(models)),
+        use_container_width=True,
+        theme=None,
+    )
+    st.caption("Ô xanh: p < 0.05 — khác biệt giữa hai mô hình có ý nghĩa thống kê.")
+
+
+def _show_calibration_section(manifest, colors):
+    """Reliability diagram + Brier / ECE / MCE theo giai đoạn."""
+    by_model = files_by_model(manifest)
+    scored = [m for m, files in by_model.items() if any(has_scores(*f) for f in files.values())]
+    if not scored:
+        return
+
+    st.markdown("<h2 style='font-size: 32px; margin: 30px 0 10px;'>Hiệu chuẩn xác suất (Calibration)</h2>", unsafe_allow_html=True)
+    c1, c2, c3 = st.columns([2, 1, 1])
+    model = c1.selectbox("Mô hình", scored, key="calibration_model")
+    n_bins = c2.slider("Số bin", 5, 30, 10, key="calibration_bins")
+    strategy = c3.radio("Chia bin", ["uniform", "quantile"], horizontal=True, key="calibration_strategy",
+                        format_func=lambda s: "Đều" if s == "uniform" else "Theo phân vị")
+
+    rows = []
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=[0, 1], y=[0, 1], mode="lines", line=dict(dash="dash", color="#a0aec0"), name="Hiệu chuẩn hoàn hảo"))
+    for p, f in sorted(by_model[model].items()):
+        cal = file_calibration(*f, n_bins=n_bins, strategy=strategy)
+        if cal is None:
+            continue
+        rows.append({"Giai đoạn": p, "Brier": cal["brier"], "ECE": cal["ece"], "MCE": cal["mce"]})
+        filled = cal["count"] > 0
+        fig.add_trace(go.Scatter(
+            x=cal["mean_score"][filled],
+            y=cal["frac_pos"][filled],
+            mode="lines+markers",
+            name=f"Giai đoạn {p}",
+            line=dict(color=PHASE_COLORS[(p - 1) % len(PHASE_COLORS)], width=2),
+            customdata=cal["count"][filled],
+            hovertemplate="Điểm TB: %{x:.3f}<br>Tỷ lệ bỏ học thực tế: %{y:.3f}<br>Số mẫu: %{customdata:,}<extra></extra>",
+        ))
+    fig.update_layout(xaxis_title="Xác suất dự đoán trung bình", yaxis_title="Tỷ lệ bỏ học thực tế", xaxis=dict(range=[0, 1]), yaxis=dict(range=[0, 1]))
+
+    g1, g2 = st.columns([2, 1])
+    g1.plotly_chart(_style_fig(fig, colors, f"Reliability diagram — {model}", height=520), use_container_width=True, theme=None)
+    with g2:
+        st.dataframe(
+            pd.DataFrame(rows).style.format({"Brier": "{:.4f}", "ECE": "{:.4f}", "MCE": "{:.4f}"}),
+            hide_index=True,
+            use_container_width=True,
+        )
+        st.caption("Đường nằm dưới đường chéo = mô hình quá tự tin (overconfidence), như cảnh báo S_san+ trong trang Chất lượng dữ liệu.")
 
 
 def show(theme="Light"):
@@ -36,144 +474,31 @@ def show(theme="Light"):
     )
 
     # =========================
-    # DATA (9 models)
+    # LEADERBOARD (tính từ file dự đoán)
     # =========================
-    models = [
-        {
-            "model": "RandomForest",
-            "params": [
-                "n_estimators: 500",
-                "min_samples_split: 10",
-                "min_samples_leaf: 4",
-                "max_depth: 20",
-                "bootstrap: False",
-            ],
-            "tests": [
-                {"acc": 0.8776, "prec": 0.9419, "rec": 0.9181, "f1": 0.9299, "auc": 0.8987},
-                {"acc": 0.8754, "prec": 0.9132, "rec": 0.9492, "f1": 0.9309, "auc": 0.8792},
-                {"acc": 0.8752, "prec": 0.9124, "rec": 0.9499, "f1": 0.9308, "auc": 0.8948},
-                {"acc": 0.9021, "prec": 0.9409, "rec": 0.9488, "f1": 0.9448, "auc": 0.9490},
-                {"acc": 0.9364, "prec": 0.9872, "rec": 0.9402, "f1": 0.9631, "auc": 0.9835},
-            ],
-            "avg": {"acc": 0.8933, "prec": 0.7320, "rec": 0.7340, "f1": 0.7320, "auc": 0.9210},
-        },
-        {
-            "model": "XGBoost",
-            "params": [
-                "learning_rate: 0.05",
-                "max_depth: 8",
-                "min_child_weight: 1",
-                "n_estimators: 500",
-                "subsample: 0.8",
-                "scaler: RobustScaler()",
-            ],
-            "tests": [
-                {"acc": 0.8819, "prec": 0.6974, "rec": 0.6081, "f1": 0.6333, "auc": 0.8087},
-                {"acc": 0.8764, "prec": 0.6814, "rec": 0.6198, "f1": 0.6408, "auc": 0.8148},
-                {"acc": 0.8755, "prec": 0.6862, "rec": 0.6464, "f1": 0.6625, "auc": 0.8663},
-                {"acc": 0.9234, "prec": 0.8071, "rec": 0.8491, "f1": 0.8261, "auc": 0.9630},
-                {"acc": 0.9352, "prec": 0.8240, "rec": 0.9286, "f1": 0.8652, "auc": 0.9844},
-            ],
-            "avg": {"acc": 0.8985, "prec": 0.7400, "rec": 0.7320, "f1": 0.7260, "auc": 0.8874},
-        },
-        {
-            "model": "ANN-LSTM",
-            "params": [],
-            "tests": [
-                {"acc": 0.7988, "prec": 0.9542, "rec": 0.8111, "f1": 0.8769, "auc": 0.8590},
-                {"acc": 0.8472, "prec": 0.9496, "rec": 0.8733, "f1": 0.9099, "auc": 0.8823},
-                {"acc": 0.8725, "prec": 0.9650, "rec": 0.8878, "f1": 0.9248, "auc": 0.9276},
-                {"acc": 0.9006, "prec": 0.9800, "rec": 0.9060, "f1": 0.9416, "auc": 0.9612},
-                {"acc": 0.9034, "prec": 0.9893, "rec": 0.9004, "f1": 0.9428, "auc": 0.9747},
-            ],
-            "avg": {"acc": 0.8645, "prec": 0.7140, "rec": 0.8260, "f1": 0.7480, "auc": 0.9210},
-        },
-        {
-            "model": "Linear SVM",
-            "params": [
-                "C: 1",
-                "class_weight: balanced",
-            ],
-            "tests": [
-                {"acc": 0.5809, "prec": 0.9520, "rec": 0.5535, "f1": 0.7000, "auc": 0.7241},
-                {"acc": 0.3164, "prec": 0.9620, "rec": 0.2354, "f1": 0.3783, "auc": 0.6769},
-                {"acc": 0.4482, "prec": 0.9260, "rec": 0.4080, "f1": 0.5664, "auc": 0.6657},
-                {"acc": 0.6291, "prec": 0.9441, "rec": 0.6166, "f1": 0.7460, "auc": 0.7170},
-                {"acc": 0.7468, "prec": 0.9587, "rec": 0.7455, "f1": 0.8387, "auc": 0.8287},
-            ],
-            "avg": {"acc": 0.5443, "prec": 0.5680, "rec": 0.6500, "f1": 0.4720, "auc": 0.7225},
-        },
-        {
-            "model": "LightGBM",
-            "params": [
-                "learning_rate: 0.05",
-                "max_depth: -1",
-                "n_estimators: 200",
-                "num_leaves: 63",
-            ],
-            "tests": [
-                {"acc": 0.8583, "prec": 0.9113, "rec": 0.9302, "f1": 0.9206, "auc": 0.8069},
-                {"acc": 0.8603, "prec": 0.9137, "rec": 0.9296, "f1": 0.9216, "auc": 0.8097},
-                {"acc": 0.8661, "prec": 0.9224, "rec": 0.9263, "f1": 0.9244, "auc": 0.8839},
-                {"acc": 0.9089, "prec": 0.9552, "rec": 0.9409, "f1": 0.9480, "auc": 0.9467},
-                {"acc": 0.9309, "prec": 0.9898, "rec": 0.9314, "f1": 0.9597, "auc": 0.9842},
-            ],
-            "avg": {"acc": 0.8849, "prec": 0.7120, "rec": 0.7300, "f1": 0.7180, "auc": 0.8863},
-        },
-        {
-            "model": "LSTM",
-            "params": [],
-            "tests": [
-                {"acc": 0.8764, "prec": 0.8863, "rec": 0.9867, "f1": 0.9338, "auc": 0.6060},
-                {"acc": 0.8821, "prec": 0.8934, "rec": 0.9839, "f1": 0.9365, "auc": 0.6776},
-                {"acc": 0.9034, "prec": 0.9279, "rec": 0.9657, "f1": 0.9464, "auc": 0.8149},
-                {"acc": 0.9174, "prec": 0.9559, "rec": 0.9503, "f1": 0.9531, "auc": 0.9075},
-                {"acc": 0.8883, "prec": 0.9713, "rec": 0.9001, "f1": 0.9343, "auc": 0.9333},
-            ],
-            "avg": {"acc": 0.8935, "prec": 0.7180, "rec": 0.6840, "f1": 0.6740, "auc": 0.7879},
-        },
-        {
-            "model": "CatBoost",
-            "params": [
-                "depth: 6",
-                "learning_rate: 0.05",
-            ],
-            "tests": [
-                {"acc": 0.8946, "prec": 0.8970, "rec": 0.9950, "f1": 0.9435, "auc": 0.8196},
-                {"acc": 0.8902, "prec": 0.8925, "rec": 0.9956, "f1": 0.9412, "auc": 0.7708},
-                {"acc": 0.8907, "prec": 0.8926, "rec": 0.9960, "f1": 0.9415, "auc": 0.8275},
-                {"acc": 0.9239, "prec": 0.9226, "rec": 0.9975, "f1": 0.9586, "auc": 0.9642},
-                {"acc": 0.9548, "prec": 0.9572, "rec": 0.9933, "f1": 0.9749, "auc": 0.9753},
-            ],
-            "avg": {"acc": 0.9108, "prec": 0.8710, "rec": 0.6326, "f1": 0.6621, "auc": 0.8715},
-        },
-        {
-            "model": "KNN",
-            "params": [],
-            "tests": [
-                {"acc": 0.8942, "prec": 0.9072, "rec": 0.9806, "f1": 0.9424, "auc": 0.8358},
-                {"acc": 0.8957, "prec": 0.9010, "rec": 0.9908, "f1": 0.9437, "auc": 0.7803},
-                {"acc": 0.9044, "prec": 0.9071, "rec": 0.9936, "f1": 0.9484, "auc": 0.8357},
-                {"acc": 0.9222, "prec": 0.9271, "rec": 0.9898, "f1": 0.9574, "auc": 0.9315},
-                {"acc": 0.9378, "prec": 0.9514, "rec": 0.9796, "f1": 0.9653, "auc": 0.9522},
-            ],
-            "avg": {"acc": 0.9109, "prec": 0.8396, "rec": 0.6610, "f1": 0.6994, "auc": 0.8671},
-        },
-        {
-            "model": "TabNet",
-            "params": [],
-            "tests": [
-                {"acc": 0.8881, "prec": 0.9306, "rec": 0.9437, "f1": 0.9371, "auc": 0.8812},
-                {"acc": 0.8978, "prec": 0.9195, "rec": 0.9692, "f1": 0.9437, "auc": 0.8788},
-                {"acc": 0.9238, "prec": 0.9420, "rec": 0.9737, "f1": 0.9576, "auc": 0.9261},
-                {"acc": 0.9376, "prec": 0.9479, "rec": 0.9834, "f1": 0.9653, "auc": 0.9423},
-                {"acc": 0.9540, "prec": 0.9627, "rec": 0.9861, "f1": 0.9743, "auc": 0.9735},
-            ],
-            "avg": {"acc": 0.9203, "prec": 0.8258, "rec": 0.7528, "f1": 0.7817, "auc": 0.9204},
-        },
-    ]
-
-    def fmt(x: float) -> str:
+    metric_labels = {"f1": "F1-Score", "auc": "ROC-AUC", "acc": "Accuracy", "prec": "Precision", "rec": "Recall"}
+    manifest = discover_prediction_files()
+    if manifest:
+        sort_by = st.selectbox(
+            "Xếp hạng theo",
+            options=list(metric_labels),
+            format_func=lambda k: metric_labels[k],
+            key="leaderboard_sort_by",
+        )
+        models = [
+            {**row, "params": model_params(row["model"], MODEL_PARAMS)}
+            for row in compute_leaderboard(manifest, sort_by)
+        ]
+    else:
+        models = REFERENCE_RESULTS
+        st.info(
+            f"Chưa có file dự đoán trong '{PREDICTIONS_DIR}/<model>/test_P{{n}}_pred.csv' "
+            "— đang hiển thị kết quả tham chiếu."
+        )
+
+    def fmt(x) -> str:
+        if x is None or x != x:
+            return "—"
         return f"{x:.4f}"
 
     def build_row(m):
@@ -181,6 +506,9 @@ def show(theme="Light"):
 
         test_cells = []
         for t in m["tests"]:
+            if t is None:
+                test_cells.extend(["<td class='metric'>—</td>"] * 5)
+                continue
             test_cells.extend([
                 f"<td class='metric'>{fmt(t['acc'])}</td>",
                 f"<td class='metric'>{fmt(t['prec'])}</td>",
@@ -382,6 +710,13 @@ def show(theme="Light"):
 
     components.html(html_table, height=800, scrolling=False)
 
+    if manifest:
+        _show_threshold_section(manifest, colors)
+        _show_course_breakdown(manifest, theme)
+        _show_bootstrap_section(manifest, colors)
+        _show_significance_section(manifest, colors)
+        _show_calibration_section(manifest, colors)
+
     # phần dưới giữ nguyên
     st.markdown("<h2 style='font-size: 32px; margin-bottom: 20px;'>Model Categories</h2>", unsafe_allow_html=True)
     c1, c2, c3 = st.columns(3)
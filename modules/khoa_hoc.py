@@ -1,12 +1,156 @@
+import numpy as np
 import streamlit as st
 import pandas as pd
+import plotly.express as px
 from typing import Optional
-from datetime import datetime
+from datetime import date, datetime, timedelta
 
-from modules.data_loader import load_courses
+from modules.data_loader import load_courses, dataset_version, COURSES_PATH, USERS_PATH
+from modules.facets import course_facets, facet_masks, facet_counts, combine
+from modules.interval_index import course_interval_index, count_overlap, overlap
+from modules.pagination import catalog_order, order_within, paginate
+from modules.search_index import course_search_index, search
 from modules.theme_system import get_theme_colors
 
 
+# Nhãn hiển thị -> (cột sắp xếp, giảm dần)
+SORT_OPTIONS = {
+    "Độ phù hợp": None,
+    "Số học viên": ("user_count", True),
+    "Ngày bắt đầu (mới nhất)": ("class_start", True),
+    "Tỷ lệ bỏ học dự đoán": ("risk", True),
+}
+
+
+# (facet, nhãn, key widget)
+FACET_WIDGETS = (
+    ("school", "🏫 Trường", "khoa_f_school"),
+    ("certificate", "🎓 Chứng chỉ", "khoa_f_certificate"),
+    ("user_count", "👥 Số học viên", "khoa_f_user_count"),
+)
+# (facet ngày, nhãn, key widget)
+DATE_WIDGETS = (
+    ("class_start", "🗓️ Ngày bắt đầu", "khoa_f_start"),
+    ("class_end", "🏁 Ngày kết thúc", "khoa_f_end"),
+)
+# Khoảng ngày "đang diễn ra" (1 ngày hoặc 1 khoảng), truy vấn qua interval tree
+RUNNING_KEY = "khoa_f_running"
+TIMELINE_MAX = 40
+_EPOCH = date(1970, 1, 1)
+
+
+def _day_bounds(days: np.ndarray):
+    valid = days[days > np.iinfo(np.int64).min]
+    if not len(valid):
+        return None
+    return _EPOCH + timedelta(days=int(valid.min())), _EPOCH + timedelta(days=int(valid.max()))
+
+
+def _facet_selection(facets: dict) -> dict:
+    """Current filter selection, read from the widget state before the widgets are drawn."""
+    selection = {name: list(st.session_state.get(key, [])) for name, _, key in FACET_WIDGETS if name in facets}
+    for name, _, key in DATE_WIDGETS:
+        picked, bounds = st.session_state.get(key), _day_bounds(facets[name])
+        if picked and bounds and tuple(picked) != bounds:
+            selection[name] = ((picked[0] - _EPOCH).days, (picked[1] - _EPOCH).days)
+        else:
+            selection[name] = None
+    picked = tuple(st.session_state.get(RUNNING_KEY) or ())
+    selection["running"] = tuple((d - _EPOCH).days for d in (picked[0], picked[-1])) if picked else None
+    return selection
+
+
+def _clear_facets() -> None:
+    for _, _, key in FACET_WIDGETS + DATE_WIDGETS:
+        st.session_state.pop(key, None)
+    st.session_state.pop(RUNNING_KEY, None)
+
+
+def _show_facet_filters(facets: dict, masks: dict, n_courses: int, active: bool, tree: dict, running) -> None:
+    """Facet widgets; option labels carry live counts under the other active filters."""
+    with st.expander("🎛️ Bộ lọc", expanded=active):
+        cols = st.columns(len(FACET_WIDGETS))
+        for col, (name, label, key) in zip(cols, FACET_WIDGETS):
+            if name not in facets:
+                continue
+            labels, counts = facets[name]["labels"], facet_counts(facets, masks, name)
+            with col:
+                st.multiselect(
+                    label,
+                    options=list(range(len(labels))),
+                    format_func=lambda i, labels=labels, counts=counts: f"{labels[i]} ({counts[i]:,})",
+                    key=key,
+                    placeholder="Tất cả",
+                )
+
+        cols = st.columns(len(DATE_WIDGETS) + 1)
+        for col, (name, label, key) in zip(cols, DATE_WIDGETS):
+            bounds = _day_bounds(facets[name])
+            if bounds is None or bounds[0] == bounds[1]:
+                continue
+            with col:
+                st.slider(label, min_value=bounds[0], max_value=bounds[1], value=bounds, format="DD/MM/YYYY", key=key)
+
+        start_bounds, end_bounds = _day_bounds(facets["class_start"]), _day_bounds(facets["class_end"])
+        if start_bounds and end_bounds:
+            with cols[-1]:
+                st.date_input(
+                    "🟢 Đang diễn ra trong",
+                    value=[],
+                    min_value=start_bounds[0],
+                    max_value=end_bounds[1],
+                    format="DD/MM/YYYY",
+                    key=RUNNING_KEY,
+                    help="Chọn 1 ngày hoặc 1 khoảng ngày",
+                )
+                if running:
+                    st.caption(f"{count_overlap(tree, *running):,} khóa học đang diễn ra (toàn bộ danh mục)")
+
+        col_count, col_clear = st.columns([4, 1])
+        with col_count:
+            st.caption(f"{int(combine(masks, n_courses).sum()):,} khóa học phù hợp với bộ lọc")
+        with col_clear:
+            st.button("Xóa bộ lọc", key="khoa_f_clear", on_click=_clear_facets, disabled=not active)
+
+
+def _show_timeline(df: pd.DataFrame, rows: np.ndarray, running, theme: str) -> None:
+    """Gantt of the first TIMELINE_MAX courses of the current list (display order)."""
+    with st.expander("📅 Dòng thời gian khóa học", expanded=bool(running)):
+        if not len(rows):
+            st.info("Không có khóa học nào để hiển thị.")
+            return
+        top = df.iloc[rows[:TIMELINE_MAX]]
+        df_tl = pd.DataFrame({
+            "Khóa học": top["course_id"].astype(str) + " · " + top["course_name"].astype(str),
+            "Bắt đầu": pd.to_datetime(top["class_start"], format="%m/%d/%Y", errors="coerce"),
+            "Kết thúc": pd.to_datetime(top["class_end"], format="%m/%d/%Y", errors="coerce"),
+            "Trường": top["school_name"].fillna("N/A").astype(str) if "school_name" in top.columns else "N/A",
+        }).dropna(subset=["Bắt đầu", "Kết thúc"])
+        if df_tl.empty:
+            st.info("Các khóa học này không có ngày bắt đầu / kết thúc.")
+            return
+
+        colors = get_theme_colors(theme)
+        fig = px.timeline(df_tl, x_start="Bắt đầu", x_end="Kết thúc", y="Khóa học", color="Trường")
+        fig.update_yaxes(autorange="reversed", title="")
+        if running:
+            fig.add_vrect(
+                x0=_EPOCH + timedelta(days=running[0]),
+                x1=_EPOCH + timedelta(days=running[1] + 1),
+                fillcolor="#48bb78", opacity=0.15, line_width=0,
+            )
+        fig.update_layout(
+            height=max(300, 22 * len(df_tl) + 120),
+            plot_bgcolor=colors["chart_bg"],
+            paper_bgcolor=colors["chart_bg"],
+            font=dict(color=colors["chart_text"]),
+            xaxis=dict(gridcolor=colors["chart_grid"], title=""),
+            margin=dict(l=10, r=10, t=30, b=10),
+        )
+        st.plotly_chart(fig, use_container_width=True, theme=None)
+        if len(rows) > TIMELINE_MAX:
+            st.caption(f"Hiển thị {TIMELINE_MAX} / {len(rows):,} khóa học đầu tiên theo thứ tự hiện tại.")
+
 
 def format_date_ddmmyyyy(date_str: str) -> str:
     """
@@ -278,34 +422,60 @@ def show(df: Optional[pd.DataFrame] = None, theme: str = "Light") -> None:
 
     # ===== UI =====
     st.title("Danh Sách Khóa Học")
-    search_query = st.text_input(
-        "🔍 Tìm kiếm khóa học bằng tên hoặc ID...",
-        placeholder="Nhập ID hoặc tên khóa học...",
-    )
+    col_search, col_sort = st.columns([3, 1])
+    with col_search:
+        search_query = st.text_input(
+            "🔍 Tìm kiếm khóa học bằng tên hoặc ID...",
+            placeholder="Nhập ID hoặc tên khóa học...",
+        ).strip()
+    with col_sort:
+        sort_label = st.selectbox("Sắp xếp theo", list(SORT_OPTIONS), key="khoa_sort")
+
+    # "Độ phù hợp" chỉ có nghĩa khi đang tìm kiếm; còn lại dùng thứ tự số học viên
+    sort_spec = SORT_OPTIONS[sort_label] or SORT_OPTIONS["Số học viên"]
+    version = dataset_version(COURSES_PATH, USERS_PATH) if sort_spec[0] == "risk" else dataset_version(COURSES_PATH)
+    order = catalog_order(df, version, *sort_spec)
 
     if search_query:
-        st.session_state.khoa_current_page = 1
-        df_filtered = df[
-            df["course_id"].astype(str).str.contains(search_query, case=False, na=False)
-            | df["course_name"].str.contains(search_query, case=False, na=False)
-        ]
+        # Index dựng 1 lần / phiên bản catalog; không dấu vẫn khớp (vd "giai tich" → "Giải tích")
+        index = course_search_index(df, dataset_version(COURSES_PATH))
+        rows = search(index, search_query)
+        if SORT_OPTIONS[sort_label] is not None:
+            rows = order_within(order, rows)
     else:
-        df_filtered = df.copy()
-
-    PAGE_SIZE = 12
-    total_courses = len(df_filtered)
-    total_pages = (total_courses + PAGE_SIZE - 1) // PAGE_SIZE
-    if total_pages == 0:
-        total_pages = 1
-
-    if st.session_state.khoa_current_page > total_pages:
-        st.session_state.khoa_current_page = total_pages
-    if st.session_state.khoa_current_page < 1:
+        rows = order
+
+    # Bộ lọc: mã facet tính sẵn 1 lần / phiên bản catalog, đếm bằng bincount
+    facets = course_facets(df, dataset_version(COURSES_PATH))
+    selection = _facet_selection(facets)
+    masks = facet_masks(facets, {k: v for k, v in selection.items() if k != "running"})
+    tree = course_interval_index(df, dataset_version(COURSES_PATH))
+    if selection["running"]:
+        running = np.zeros(len(df), dtype=bool)
+        running[overlap(tree, *selection["running"])] = True
+        masks["running"] = running
+    if search_query:
+        in_search = np.zeros(len(df), dtype=bool)
+        in_search[rows] = True
+        masks["search"] = in_search
+    active = any(bool(v) for v in selection.values())
+    _show_facet_filters(facets, masks, len(df), active, tree, selection["running"])
+    if active:
+        rows = rows[combine(masks, len(df))[rows]]
+    _show_timeline(df, rows, selection["running"], theme)
+
+    # Chỉ quay về trang 1 khi từ khóa, thứ tự hoặc bộ lọc thay đổi
+    list_state = (search_query, sort_label, tuple((k, tuple(v) if isinstance(v, list) else v) for k, v in selection.items()))
+    if st.session_state.get("khoa_list_state") != list_state:
         st.session_state.khoa_current_page = 1
+        st.session_state.khoa_list_state = list_state
 
-    start_index = (st.session_state.khoa_current_page - 1) * PAGE_SIZE
-    end_index = start_index + PAGE_SIZE
-    courses_on_page = df_filtered.iloc[start_index:end_index].to_dict("records")
+    PAGE_SIZE = 12
+    page = paginate(rows, st.session_state.khoa_current_page, PAGE_SIZE)
+    st.session_state.khoa_current_page = page["page"]
+    total_pages = page["total_pages"]
+    start_index = page["start"]
+    courses_on_page = df.iloc[page["rows"]].to_dict("records")
 
     st.markdown("---")
 
@@ -0,0 +1,86 @@
+"""
+Top-K course leaderboard over per-course counts.
+Counts per source (train or a test phase) are rolled up from the learner cube and
+cached per dataset version; ranking a metric is an argpartition over the eligible
+courses plus a sort of K.
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from modules.olap_cube import query
+
+# key -> (nhãn hiển thị, là tỷ lệ?)
+METRICS = {
+    "dropout_count": ("Số lượng bỏ học", False),
+    "dropout_rate": ("Tỷ lệ bỏ học", True),
+    "predicted_count": ("Số dự đoán bỏ học", False),
+    "weighted_rate": ("Tỷ lệ bỏ học (hiệu chỉnh quy mô)", True),
+}
+
+
+def _with_rates(out: dict) -> dict:
+    """
+    Add the ranking metrics to per-course n / dropped / predicted counts.
+    ``weighted_rate`` shrinks every course's rate towards the overall rate with a prior
+    of median-course-size learners, so tiny courses cannot top the ranking by chance.
+    """
+    n, k = out["n"], len(out["n"])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out["dropout_rate"] = out["dropped"] / n if out["dropped"] is not None else None
+    if out["dropped"] is not None and k:
+        prior_n = float(np.median(n))
+        overall = out["dropped"].sum() / max(n.sum(), 1)
+        out["weighted_rate"] = (out["dropped"] + prior_n * overall) / (n + prior_n)
+    else:
+        out["weighted_rate"] = None
+    out["dropout_count"] = out["dropped"]
+    out["predicted_count"] = out["predicted"]
+    return out
+
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def cube_course_counts(_cube, version: str, phase: int) -> dict:
+    """
+    Per-course n / dropped (label) / predicted (predict) of one phase (0 = train), rolled
+    up from the learner cube; dropped / predicted are None when the column is unknown.
+    """
+    df_n = query(_cube, by=["course"], where={"phase": phase})
+    out = {"course_id": df_n["course"].to_numpy(dtype=object), "n": df_n["count"].to_numpy()}
+    pos = pd.Index(df_n["course"])
+    for key, dim in (("dropped", "label"), ("predicted", "predict")):
+        known = query(_cube, where={"phase": phase, dim: ["0", "1"]})["count"].iloc[0]
+        if not known:
+            out[key] = None
+            continue
+        hits = query(_cube, by=["course"], where={"phase": phase, dim: "1"})
+        counts = np.zeros(len(pos), dtype=np.int64)
+        counts[pos.get_indexer(hits["course"])] = hits["count"].to_numpy()
+        out[key] = counts
+    return _with_rates(out)
+
+
+def top_k(values: np.ndarray, k: int, eligible: np.ndarray = None) -> np.ndarray:
+    """
+    Indices of the ``k`` largest ``values`` (descending; ties by index) among ``eligible``,
+    in O(n + k log k) via argpartition.
+    """
+    idx = np.flatnonzero(~np.isnan(values) if eligible is None else eligible & ~np.isnan(values))
+    if not len(idx) or k <= 0:
+        return idx[:0]
+    if k < len(idx):
+        # ngưỡng = giá trị lớn thứ k; giữ mọi phần tử >= ngưỡng để xử lý hòa ổn định
+        kth = values[idx][np.argpartition(-values[idx], k - 1)[k - 1]]
+        idx = idx[values[idx] >= kth]
+    order = np.lexsort((idx, -values[idx]))
+    return idx[order][:k]
+
+
+def leaderboard(counts: dict, metric: str = "dropout_count", k: int = 5, min_support: int = 1) -> pd.DataFrame:
+    """Top-k courses by ``metric`` among courses with at least ``min_support`` learners."""
+    values = counts.get(metric)
+    if values is None:
+        return pd.DataFrame(columns=["course_id", "n", "value"])
+    values = np.asarray(values, dtype=np.float64)
+    idx = top_k(values, k, counts["n"] >= min_support)
+    return pd.DataFrame({"course_id": counts["course_id"][idx], "n": counts["n"][idx], "value": values[idx]})
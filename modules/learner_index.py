@@ -0,0 +1,131 @@
+"""
+Per-course learner indexes over the P5 prediction table (load_users()).
+Built lazily on first use of a course and kept in an LRU-bounded resource cache; all
+builders read one shared copy of the table (users_frame()) rather than their own.
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from modules.data_loader import load_users
+from modules.pagination import sort_order
+
+MAX_CACHED_COURSES = 32
+# Sortable learner columns (risk = P5 ``predict``)
+SORT_KEYS = ("predict", "enroll_time", "num_videos_P5", "n_attempts_P5", "num_active_days_P5")
+# Metric -> nhãn hiển thị của thứ hạng trong khóa học ("top 12% ...")
+PERCENTILE_COLS = {
+    "num_videos_P5": "lượt xem video",
+    "n_comments_P5": "bình luận",
+    "n_attempts_P5": "bài tập đã làm",
+    "accuracy_rate_P5": "độ chính xác",
+}
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def users_frame(version: str) -> pd.DataFrame:
+    """One shared (read-only) load_users() table, instead of a copy per index builder."""
+    return load_users()
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def course_rows(version: str) -> dict:
+    """{course_id: row positions in load_users()}, from one factorize + stable argsort."""
+    df_users = users_frame(version)
+    if df_users.empty:
+        return {}
+    codes, courses = pd.factorize(df_users["course_id"].astype(str))
+    order = np.argsort(codes, kind="stable")
+    bounds = np.cumsum(np.bincount(codes, minlength=len(courses)))[:-1]
+    return dict(zip(courses, np.split(order, bounds)))
+
+
+def rows_for_course(course_id: str, version: str) -> np.ndarray:
+    return course_rows(version).get(str(course_id), np.empty(0, dtype=np.int64))
+
+
+@st.cache_resource(max_entries=MAX_CACHED_COURSES, show_spinner=False)
+def course_prefix_index(course_id: str, version: str) -> dict:
+    """
+    Sorted lowercase user_id keys of one course, plus the same ids without their
+    "U_"-style prefix so typing just the digits also matches.
+    """
+    rows = rows_for_course(course_id, version)
+    ids = users_frame(version)["user_id"].astype(str).to_numpy()[rows]
+    lower = np.char.lower(ids.astype(str))
+    short = np.array([s.split("_", 1)[1] if "_" in s else s for s in lower], dtype=lower.dtype)
+
+    keys = np.concatenate([lower, short])
+    key_rows = np.concatenate([rows, rows])
+    order = np.argsort(keys, kind="stable")
+    return {"rows": rows, "keys": keys[order], "key_rows": key_rows[order], "ids": dict(zip(rows.tolist(), ids.tolist()))}
+
+
+@st.cache_resource(max_entries=MAX_CACHED_COURSES, show_spinner=False)
+def course_sort_orders(course_id: str, version: str) -> dict:
+    """
+    {(column, descending): row positions of the course in that order} for SORT_KEYS,
+    computed once per course so re-sorting or paging is just a gather.
+    """
+    rows = rows_for_course(course_id, version)
+    df_course = users_frame(version).iloc[rows]
+    out = {}
+    for col in SORT_KEYS:
+        if col not in df_course.columns:
+            continue
+        keys = pd.to_datetime(df_course[col], errors="coerce") if col == "enroll_time" else df_course[col]
+        for desc in (True, False):
+            out[(col, desc)] = rows[sort_order(keys, desc)]
+    return out
+
+
+def _prefix_range(index: dict, prefix: str):
+    p = prefix.strip().lower()
+    keys = index["keys"]
+    lo = int(np.searchsorted(keys, p, side="left"))
+    hi = int(np.searchsorted(keys, p + "\U0010ffff", side="left"))
+    return lo, hi
+
+
+def prefix_search(index: dict, prefix: str) -> np.ndarray:
+    """Row positions (file order) of learners whose user_id starts with ``prefix``."""
+    lo, hi = _prefix_range(index, prefix)
+    return np.unique(index["key_rows"][lo:hi])
+
+
+def suggest(index: dict, prefix: str, limit: int = 8) -> list:
+    """Up to ``limit`` distinct user_ids completing ``prefix``, in key order."""
+    lo, hi = _prefix_range(index, prefix)
+    out, seen = [], set()
+    for r in index["key_rows"][lo:hi]:
+        if r not in seen:
+            seen.add(r)
+            out.append(index["ids"][int(r)])
+            if len(out) == limit:
+                break
+    return out
+
+
+@st.cache_data(show_spinner=False)
+def course_risk(version: str) -> pd.Series:
+    """Predicted dropout rate (mean of P5 ``predict``) per course_id."""
+    df_users = users_frame(version)
+    if df_users.empty or "predict" not in df_users.columns:
+        return pd.Series(dtype=np.float64)
+    codes, courses = pd.factorize(df_users["course_id"].astype(str))
+    n = np.bincount(codes, minlength=len(courses))
+    rate = np.bincount(codes, weights=df_users["predict"].to_numpy(dtype=np.float64), minlength=len(courses)) / n
+    return pd.Series(rate, index=courses)
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def course_percentiles(version: str) -> pd.DataFrame:
+    """
+    "Top X%" of every learner within their course for each PERCENTILE_COLS metric: the
+    share of the course with a value >= theirs (ties count as reached, NaN stays NaN).
+    One groupby rank for all courses; rows/index match load_users().
+    """
+    df_users = users_frame(version)
+    cols = [c for c in PERCENTILE_COLS if c in df_users.columns]
+    values = df_users[cols].apply(pd.to_numeric, errors="coerce")
+    return values.groupby(df_users["course_id"].astype(str)).rank(method="max", ascending=False, pct=True)
@@ -0,0 +1,249 @@
+"""
+Model evaluation engine for the prediction-results page.
+Metrics are computed from the per-model prediction files instead of hard-coded values.
+"""
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from modules.data_loader import PREDICTIONS_DIR, load_prediction_file
+
+PHASES = (1, 2, 3, 4, 5)
+METRIC_KEYS = ("acc", "prec", "rec", "f1", "auc")
+MAX_WORKERS = 8
+
+
+def _safe_div(num, den):
+    return float(num) / float(den) if den else float("nan")
+
+
+def average_ranks(x: np.ndarray) -> np.ndarray:
+    """1-based ranks of ``x`` with ties sharing their average rank."""
+    x = np.asarray(x)
+    order = np.argsort(x, kind="mergesort")
+    xs = x[order]
+    # start index of each run of equal values
+    starts = np.flatnonzero(np.r_[True, xs[1:] != xs[:-1]])
+    ends = np.r_[starts[1:], len(xs)]
+    run_rank = (starts + ends + 1) / 2.0
+    ranks = np.empty(len(x), dtype=np.float64)
+    ranks[order] = np.repeat(run_rank, ends - starts)
+    return ranks
+
+
+def roc_auc(label: np.ndarray, score: np.ndarray) -> float:
+    """ROC-AUC via the Mann-Whitney rank statistic (O(n log n))."""
+    label = np.asarray(label) == 1
+    n_pos = int(label.sum())
+    n_neg = len(label) - n_pos
+    if n_pos == 0 or n_neg == 0:
+        return float("nan")
+    ranks = average_ranks(score)
+    return float((ranks[label].sum() - n_pos * (n_pos + 1) / 2.0) / (n_pos * n_neg))
+
+
+def binary_metrics(label, predict, score=None) -> dict:
+    """acc/prec/rec/f1/auc for one set of predictions (positive class = 1 = bỏ học)."""
+    label = np.asarray(label, dtype=np.int64)
+    predict = np.asarray(predict, dtype=np.int64)
+    tn, fp, fn, tp = np.bincount(label * 2 + predict, minlength=4)[:4]
+    out = metrics_from_confusion({"tn": tn, "fp": fp, "fn": fn, "tp": tp})
+    # Without scores the AUC of the hard predictions is reported (single ROC point)
+    out["auc"] = roc_auc(label, predict if score is None else score)
+    return out
+
+
+def metrics_from_confusion(cm: dict) -> dict:
+    """acc/prec/rec/f1 from tn/fp/fn/tp counts."""
+    tn, fp, fn, tp = cm["tn"], cm["fp"], cm["fn"], cm["tp"]
+    return {
+        "acc": _safe_div(tp + tn, tn + fp + fn + tp),
+        "prec": _safe_div(tp, tp + fp),
+        "rec": _safe_div(tp, tp + fn),
+        "f1": _safe_div(2 * tp, 2 * tp + fp + fn),
+    }
+
+
+def _average(tests: list) -> dict:
+    rows = [t for t in tests if t]
+    if not rows:
+        return {k: float("nan") for k in METRIC_KEYS}
+    return {k: float(np.nanmean([t[k] for t in rows])) for k in METRIC_KEYS}
+
+
+@st.cache_data(show_spinner=False)
+def file_metrics(path: str, digest: str) -> dict:
+    """Metrics of one prediction file, cached per content hash."""
+    df_pred = load_prediction_file(path, digest)
+    score = df_pred["score"].to_numpy() if "score" in df_pred.columns else None
+    return binary_metrics(df_pred["label"].to_numpy(), df_pred["predict"].to_numpy(), score)
+
+
+def model_params(model: str, fallback: dict, root: str = PREDICTIONS_DIR) -> list:
+    """Best params of a model from ``<root>/<model>/params.json``, else from ``fallback``."""
+    path = os.path.join(root, model, "params.json")
+    try:
+        with open(path, encoding="utf-8") as f:
+            params = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return list(fallback.get(model, []))
+    if isinstance(params, dict):
+        return [f"{k}: {v}" for k, v in params.items()]
+    return [str(p) for p in params]
+
+
+def compute_leaderboard(manifest: tuple, sort_by: str = "f1") -> list:
+    """
+    Build leaderboard rows {model, tests, avg} from discover_prediction_files() output.
+    Models are scored in parallel on workers attached to the session's script context;
+    each file's metrics are cached by its hash.
+    """
+    by_model = files_by_model(manifest)
+    if not by_model:
+        return []
+
+    def score_model(item):
+        model, files = item
+        tests = [file_metrics(*files[p]) if p in files else None for p in PHASES]
+        return {"model": model, "tests": tests, "avg": _average(tests)}
+
+    # worker dùng chung ScriptRunContext của phiên để gọi các hàm cache_data
+    ctx = get_script_run_ctx()
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(by_model)), initializer=add_script_run_ctx, initargs=(None, ctx)) as ex:
+        rows = list(ex.map(score_model, by_model.items()))
+
+    rows.sort(key=lambda r: -np.nan_to_num(r["avg"][sort_by], nan=-1.0))
+    return rows
+
+
+# =========================
+# THRESHOLD SWEEP / ROC / PR
+# =========================
+def threshold_curve(label, score) -> dict:
+    """
+    Cumulative confusion counts at every distinct score, from one descending sort.
+    Entry i holds the counts for "predict 1 if score >= thresholds[i]"; entry 0 is the
+    empty prediction (threshold +inf).
+    """
+    label = np.asarray(label, dtype=np.int64)
+    score = np.asarray(score, dtype=np.float64)
+    order = np.argsort(-score, kind="mergesort")
+    s = score[order]
+    # last position of each run of equal scores
+    last = np.r_[np.flatnonzero(s[1:] != s[:-1]), len(s) - 1] if len(s) else np.array([], dtype=np.int64)
+    tps = np.cumsum(label[order])[last] if len(s) else np.array([], dtype=np.int64)
+    fps = last + 1 - tps
+    return {
+        "thresholds": np.r_[np.inf, s[last]],
+        "tps": np.r_[0, tps],
+        "fps": np.r_[0, fps],
+        "pos": int(label.sum()),
+        "neg": int(len(label) - label.sum()),
+    }
+
+
+def confusion_at(curve: dict, threshold: float) -> dict:
+    """tn/fp/fn/tp at ``threshold`` in O(log n) from a threshold_curve()."""
+    # thresholds are descending: count entries >= threshold
+    i = int(np.searchsorted(-curve["thresholds"], -threshold, side="right")) - 1
+    tp, fp = int(curve["tps"][i]), int(curve["fps"][i])
+    return {"tn": curve["neg"] - fp, "fp": fp, "fn": curve["pos"] - tp, "tp": tp}
+
+
+def curve_points(curve: dict, max_points: int = 2000) -> dict:
+    """ROC and PR coordinates, thinned to at most ``max_points`` for plotting."""
+    tps, fps = curve["tps"], curve["fps"]
+    tpr = tps / curve["pos"] if curve["pos"] else np.zeros(len(tps))
+    fpr = fps / curve["neg"] if curve["neg"] else np.zeros(len(fps))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        precision = np.where(tps + fps > 0, tps / (tps + fps), 1.0)
+    idx = np.unique(np.linspace(0, len(tps) - 1, min(max_points, len(tps))).astype(np.int64))
+    return {
+        "fpr": fpr[idx], "tpr": tpr[idx], "precision": precision[idx], "recall": tpr[idx],
+        "thresholds": curve["thresholds"][idx],
+        "auc": float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2.0)),
+        # average precision: sum over recall steps of precision
+        "ap": float(np.sum(np.diff(tpr) * precision[1:])),
+    }
+
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def file_curve(path: str, digest: str):
+    """threshold_curve() of one prediction file (shared, read-only), or None without scores."""
+    df_pred = load_prediction_file(path, digest)
+    if "score" not in df_pred.columns:
+        return None
+    return threshold_curve(df_pred["label"].to_numpy(), df_pred["score"].to_numpy())
+
+
+def files_by_model(manifest: tuple) -> dict:
+    """{model: {phase: (path, digest)}} from discover_prediction_files() output."""
+    out = {}
+    for model, phase, path, digest in manifest:
+        out.setdefault(model, {})[phase] = (path, digest)
+    return out
+
+
+def has_scores(path: str, digest: str) -> bool:
+    return "score" in load_prediction_file(path, digest).columns
+
+
+# =========================
+# PER-COURSE BREAKDOWN
+# =========================
+def grouped_confusion(codes, n_groups: int, label, predict) -> np.ndarray:
+    """(n_groups, 4) matrix of tn/fp/fn/tp per integer group code, in one bincount."""
+    key = np.asarray(codes, dtype=np.int64) * 4 + np.asarray(label, dtype=np.int64) * 2 + np.asarray(predict, dtype=np.int64)
+    return np.bincount(key, minlength=n_groups * 4).reshape(n_groups, 4)
+
+
+def grouped_metrics(cm: np.ndarray) -> dict:
+    """Vectorized acc/prec/rec/f1 for every row of a grouped_confusion() matrix."""
+    tn, fp, fn, tp = (cm[:, i].astype(np.float64) for i in range(4))
+    n = tn + fp + fn + tp
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return {
+            "n": n.astype(np.int64),
+            "label_rate": (fn + tp) / n,
+            "predict_rate": (fp + tp) / n,
+            "acc": (tp + tn) / n,
+            "prec": tp / (tp + fp),
+            "rec": tp / (tp + fn),
+            "f1": 2 * tp / (2 * tp + fp + fn),
+        }
+
+
+@st.cache_data(show_spinner=False)
+def phase_course_metrics(files: tuple) -> pd.DataFrame:
+    """
+    Per-course label-vs-predict metrics of every phase file, ``files`` being
+    ((phase, path, digest), ...). Courses are factorized across all phases and the
+    (phase, course) cells of all files come out of one bincount; rows without a
+    course_id are dropped.
+    """
+    frames = [load_prediction_file(path, digest)[["course_id", "label", "predict"]] for _, path, digest in files]
+    if not frames:
+        return pd.DataFrame()
+    phase_idx = np.repeat(np.arange(len(frames)), [len(f) for f in frames])
+    df = pd.concat(frames, ignore_index=True)
+    keep = df["course_id"].notna().to_numpy()
+    df, phase_idx = df[keep], phase_idx[keep]
+    codes, courses = pd.factorize(df["course_id"].astype(str), sort=True)
+    n_groups = len(frames) * len(courses)
+    cm = grouped_confusion(phase_idx * len(courses) + codes, n_groups, df["label"].to_numpy(), df["predict"].to_numpy())
+    out = pd.DataFrame({
+        "course_id": np.tile(np.asarray(courses, dtype=object), len(frames)),
+        **grouped_metrics(cm),
+        "phase": np.repeat([phase for phase, _, _ in files], len(courses)),
+    })
+    return out[out["n"] > 0].reset_index(drop=True)
+
+
+def course_breakdown(files: dict) -> pd.DataFrame:
+    """Per-course metrics for every phase of one model ({phase: (path, digest)})."""
+    return phase_course_metrics(tuple((p, *f) for p, f in sorted(files.items())))
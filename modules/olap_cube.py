@@ -0,0 +1,166 @@
+"""
+Sparse learner cube: school x course x enroll month x phase (0 = train) x label x predict.
+Rows are encoded as one mixed-radix int64 key per cell; only non-empty cells are kept,
+with a learner count, engagement sums and per-phase active counts per cell. Slices and
+roll-ups are a mask over the cells, a unique over the observed group keys and one
+bincount per measure, independent of the number of raw rows.
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from modules.data_loader import load_courses, load_train_data, dataset_version, COURSES_PATH, PHASE_PATH, TRAIN_PATH
+from modules.phase_store import PHASES, phase_frame, phase_version
+from modules.time_series import enroll_days
+
+DIMS = ("school", "course", "month", "phase", "label", "predict")
+# Tổng theo ô của các cột hành vi P1..P5 (nếu có trong bảng nguồn)
+ENGAGEMENT_COLS = tuple(f"{c}_P{i}" for c in ("num_events", "n_attempts", "num_videos") for i in PHASES)
+# Số học viên có hoạt động (num_active_days_P{i} > 0) ở từng giai đoạn
+ACTIVE_COLS = tuple(f"active_P{i}" for i in PHASES)
+_BINARY_LABELS = ["0", "1", "N/A"]
+
+
+def _binary_codes(values, n: int) -> np.ndarray:
+    if values is None:
+        return np.full(n, 2, dtype=np.int64)
+    v = pd.to_numeric(values, errors="coerce")
+    return np.where(v.isna(), 2, v.fillna(0).to_numpy() > 0).astype(np.int64)
+
+
+def build_cube(frames: dict, df_courses: pd.DataFrame) -> dict:
+    """
+    ``frames`` maps phase (0 = train) -> learner table. Courses are joined to schools
+    through the catalog; missing course ids and unknown schools get their own "N/A"
+    code, and ``course_school`` maps every course code to its school code.
+    """
+    course_cols = {p: f["course_id"].astype(str).where(f["course_id"].notna(), "N/A") for p, f in frames.items()}
+    course_ids = pd.Index(pd.unique(pd.concat(course_cols.values(), ignore_index=True)))
+    schools = df_courses.set_index(df_courses["course_id"].astype(str))["school_name"] if "school_name" in df_courses.columns else pd.Series(dtype=object)
+    course_school = pd.Series(course_ids, index=course_ids).map(schools).fillna("N/A")
+    school_codes, school_labels = pd.factorize(course_school)
+
+    parts = {d: [] for d in DIMS}
+    measures = {c: [] for c in ENGAGEMENT_COLS + ACTIVE_COLS}
+    for phase, df in frames.items():
+        n = len(df)
+        course = course_ids.get_indexer(course_cols[phase])
+        parts["course"].append(course)
+        parts["school"].append(school_codes[course])
+        parts["month"].append(enroll_days(df))
+        parts["phase"].append(np.full(n, phase, dtype=np.int64))
+        parts["label"].append(_binary_codes(df["label"] if "label" in df.columns else None, n))
+        parts["predict"].append(_binary_codes(df["predict"] if "predict" in df.columns else None, n))
+        for c in ENGAGEMENT_COLS:
+            measures[c].append(pd.to_numeric(df[c], errors="coerce").fillna(0).to_numpy(np.float64) if c in df.columns else np.zeros(n))
+        for p, c in zip(PHASES, ACTIVE_COLS):
+            src = f"num_active_days_P{p}"
+            measures[c].append((pd.to_numeric(df[src], errors="coerce").fillna(0).to_numpy() > 0).astype(np.float64) if src in df.columns else np.zeros(n))
+
+    codes = {d: np.concatenate(parts[d]).astype(np.int64) for d in DIMS}
+    # tháng đăng ký: ngày -> tháng (datetime64[M]); thiếu ngày -> mã "N/A" cuối cùng
+    days = codes["month"]
+    months = days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    month_values = np.unique(months[days >= 0])
+    codes["month"] = np.where(days >= 0, np.searchsorted(month_values, months), len(month_values))
+
+    labels = {
+        "school": list(school_labels),
+        "course": list(course_ids),
+        "month": [str(m) for m in month_values.astype("datetime64[M]")] + ["N/A"],
+        "phase": [0, *PHASES],
+        "label": _BINARY_LABELS,
+        "predict": _BINARY_LABELS,
+    }
+    sizes = [len(labels[d]) for d in DIMS]
+    # mixed-radix key, dim cuối thay đổi nhanh nhất
+    key = np.zeros(len(days), dtype=np.int64)
+    for d, size in zip(DIMS, sizes):
+        key = key * size + codes[d]
+    cells, inverse = np.unique(key, return_inverse=True)
+
+    cell_codes, rest = {}, cells.copy()
+    for d, size in reversed(list(zip(DIMS, sizes))):
+        cell_codes[d] = rest % size
+        rest //= size
+
+    n_cells = len(cells)
+    return {
+        "codes": {d: cell_codes[d] for d in DIMS},
+        "labels": labels,
+        "count": np.bincount(inverse, minlength=n_cells),
+        "measures": {c: np.bincount(inverse, weights=np.concatenate(v), minlength=n_cells) for c, v in measures.items()},
+        "month_year": np.array([m[:4] for m in labels["month"]]),
+        "course_school": np.asarray(school_codes, dtype=np.int64),
+        "n_cells": n_cells,
+    }
+
+
+def _dim_codes(cube: dict, dim: str):
+    """(codes per cell, labels) for a stored dim or the derived "year" roll-up of month."""
+    if dim == "year":
+        years, year_of_month = np.unique(cube["month_year"], return_inverse=True)
+        return year_of_month[cube["codes"]["month"]], list(years)
+    return cube["codes"][dim], cube["labels"][dim]
+
+
+def _value_codes(cube: dict, dim: str, values) -> np.ndarray:
+    labels = _dim_codes(cube, dim)[1]
+    lookup = {str(v): i for i, v in enumerate(labels)}
+    values = values if isinstance(values, (list, tuple, set, np.ndarray)) else [values]
+    return np.array([lookup[str(v)] for v in values if str(v) in lookup], dtype=np.int64)
+
+
+def slice_mask(cube: dict, where: dict = None) -> np.ndarray:
+    """Cells matching ``where`` ({dim: value or list of values}, labels as in cube["labels"])."""
+    mask = np.ones(cube["n_cells"], dtype=bool)
+    for dim, values in (where or {}).items():
+        codes, labels = _dim_codes(cube, dim)
+        keep = np.zeros(len(labels), dtype=bool)
+        keep[_value_codes(cube, dim, values)] = True
+        mask &= keep[codes]
+    return mask
+
+
+def query(cube: dict, by=(), where: dict = None, measures=()) -> pd.DataFrame:
+    """
+    Roll the cube up to the ``by`` dims (any of DIMS plus "year") over the cells matching
+    ``where``. Returns one row per non-empty group with ``count`` and the requested sums.
+    """
+    mask = slice_mask(cube, where)
+    by = list(by)
+    dim_info = [_dim_codes(cube, d) for d in by]
+    group = np.zeros(int(mask.sum()), dtype=np.int64)
+    for codes, labels in dim_info:
+        group = group * len(labels) + codes[mask]
+    # chỉ nhóm các khóa thực sự có mặt, không cấp phát mảng dày theo tích số chiều
+    if by:
+        keys, g = np.unique(group, return_inverse=True)
+    else:
+        keys, g = np.zeros(1, dtype=np.int64), group
+
+    out = {"count": np.bincount(g, weights=cube["count"][mask], minlength=len(keys))}
+    for m in measures:
+        out[m] = np.bincount(g, weights=cube["measures"][m][mask], minlength=len(keys))
+
+    df = pd.DataFrame(out)
+    df["count"] = df["count"].astype(np.int64)
+    rest = keys.copy()
+    for dim, (codes, labels) in reversed(list(zip(by, dim_info))):
+        df.insert(0, dim, np.asarray(labels, dtype=object)[rest % len(labels)])
+        rest //= len(labels)
+    return df
+
+
+def cube_version() -> str:
+    return dataset_version(TRAIN_PATH, COURSES_PATH, *[PHASE_PATH.format(phase=p) for p in PHASES])
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def learner_cube(version: str) -> dict:
+    """Cube over the training table (phase 0) and every test phase, built once per version."""
+    frames = {0: load_train_data()}
+    for p in PHASES:
+        frames[p] = phase_frame(p, phase_version(p))
+    frames = {p: f for p, f in frames.items() if not f.empty and "course_id" in f.columns}
+    return build_cube(frames, load_courses())
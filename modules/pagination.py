@@ -0,0 +1,62 @@
+"""
+Index-array pagination for the course and learner lists.
+A list is an array of row positions in a cached frame, in display order; a page is a
+slice of that array, so no page ever copies or re-sorts the underlying data.
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from modules.data_loader import dataset_version, USERS_PATH
+
+
+def sort_order(keys, descending: bool = False) -> np.ndarray:
+    """Stable argsort of ``keys`` with missing values always last."""
+    keys = pd.Series(keys)
+    missing = keys.isna().to_numpy()
+    if keys.dtype == object:
+        values = pd.factorize(keys, sort=True)[0].astype(np.float64)
+    else:
+        values = pd.to_numeric(keys, errors="coerce").to_numpy(dtype=np.float64)
+    values = -values if descending else values
+    return np.lexsort((np.arange(len(values)), values, missing))
+
+
+def order_within(order: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """``rows`` (any subset of positions) rearranged in the order of the full ``order``."""
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    rows = np.asarray(rows, dtype=np.int64)
+    return rows[np.argsort(rank[rows], kind="stable")]
+
+
+def paginate(rows: np.ndarray, page: int, page_size: int) -> dict:
+    """Clamp ``page`` and return the positions on it, O(page_size) for any page."""
+    total = len(rows)
+    total_pages = max(1, (total + page_size - 1) // page_size)
+    page = max(1, min(int(page), total_pages))
+    start = (page - 1) * page_size
+    return {
+        "rows": rows[start:start + page_size],
+        "page": page,
+        "total_pages": total_pages,
+        "total": total,
+        "start": start,
+    }
+
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def catalog_order(_df, version: str, column: str, descending: bool = True) -> np.ndarray:
+    """
+    Display order of the course catalog by one column, built once per catalog version.
+    ``column="risk"`` sorts by the predicted dropout rate of each course's P5 learners.
+    """
+    if column == "risk":
+        # import cục bộ: learner_index dùng sort_order của module này
+        from modules.learner_index import course_risk
+        keys = _df["course_id"].astype(str).map(course_risk(dataset_version(USERS_PATH)))
+    else:
+        keys = _df[column]
+    if column in ("class_start", "class_end"):
+        keys = pd.to_datetime(keys, format="%m/%d/%Y", errors="coerce")
+    return sort_order(keys, descending)
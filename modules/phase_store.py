@@ -0,0 +1,149 @@
+"""
+Shared phase prediction tables and a bitmap index over their low-cardinality attributes.
+Each attribute value is a packed bit vector (np.packbits, 1 bit per learner row); filters
+are OR within an attribute and AND across attributes, counts are popcount lookups.
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from modules.data_loader import load_courses, load_test_predictions, dataset_version, COURSES_PATH, PHASE_PATH
+
+PHASES = (1, 2, 3, 4, 5)
+# Số ngày hoạt động trong giai đoạn: 0 | 1–2 | 3–6 | 7–14 | ≥15
+ACTIVITY_BINS = (1, 3, 7, 15)
+ACTIVITY_LABELS = ["0 ngày", "1–2 ngày", "3–6 ngày", "7–14 ngày", "≥ 15 ngày"]
+ATTR_LABELS = {
+    "label": "Nhãn thực tế",
+    "predict": "Dự đoán",
+    "certificate": "Khóa có chứng chỉ",
+    "enroll_month": "Tháng đăng ký",
+    "activity": "Mức hoạt động",
+}
+
+_POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1)
+
+
+def phase_version(phase: int) -> str:
+    """Cache key of one phase table plus the catalog it is joined with."""
+    return dataset_version(PHASE_PATH.format(phase=phase), COURSES_PATH)
+
+
+@st.cache_resource(max_entries=len(PHASES), show_spinner=False)
+def phase_frame(phase: int, version: str) -> pd.DataFrame:
+    """One shared (read-only) prediction table per phase, instead of a copy per call."""
+    return load_test_predictions(phase)
+
+
+def build_bitmaps(attrs: dict, n: int) -> dict:
+    """
+    ``attrs`` maps name -> (codes, labels); codes < 0 are missing and set no bit.
+    Returns {"n", "labels": {name: labels}, "bits": {name: (n_values, ceil(n/8)) uint8}}.
+    """
+    index = {"n": n, "labels": {}, "bits": {}}
+    for name, (codes, labels) in attrs.items():
+        codes = np.asarray(codes)
+        index["labels"][name] = list(labels)
+        index["bits"][name] = np.packbits(codes[None, :] == np.arange(len(labels))[:, None], axis=1)
+    return index
+
+
+def _bool_codes(values) -> np.ndarray:
+    values = pd.to_numeric(values, errors="coerce")
+    return np.where(values.isna(), -1, values.fillna(0).to_numpy() > 0).astype(np.int64)
+
+
+@st.cache_resource(max_entries=len(PHASES), show_spinner=False)
+def learner_bitmaps(phase: int, version: str) -> dict:
+    """Bitmap index over the rows of phase_frame(phase) (same positions)."""
+    df = phase_frame(phase, version)
+    attrs = {}
+    for col in ("label", "predict"):
+        if col in df.columns:
+            attrs[col] = (_bool_codes(df[col]), ["0 - Không bỏ học", "1 - Bỏ học"])
+
+    df_courses = load_courses()
+    if "certificate" in df_courses.columns and "course_id" in df.columns:
+        cert = df["course_id"].astype(str).map(df_courses.set_index(df_courses["course_id"].astype(str))["certificate"])
+        attrs["certificate"] = (_bool_codes(cert), ["Không", "Có"])
+
+    if "enroll_time" in df.columns:
+        month = pd.to_datetime(df["enroll_time"], errors="coerce").dt.to_period("M")
+        codes, months = pd.factorize(month, sort=True)
+        attrs["enroll_month"] = (codes, [str(m) for m in months])
+
+    active_col = f"num_active_days_P{phase}"
+    if active_col in df.columns:
+        days = pd.to_numeric(df[active_col], errors="coerce")
+        codes = np.searchsorted(np.asarray(ACTIVITY_BINS), days.fillna(-1).to_numpy(), side="right")
+        attrs["activity"] = (np.where(days.isna(), -1, codes), ACTIVITY_LABELS)
+    return build_bitmaps(attrs, len(df))
+
+
+def select(index: dict, selection: dict, exclude: str = None, base=None):
+    """
+    Packed bits of the rows matching ``selection`` ({attr: [value codes]}), OR within an
+    attribute and AND across attributes, restricted to ``base`` bits if given;
+    None when nothing is selected and there is no base.
+    """
+    out = base
+    for name, values in selection.items():
+        if name == exclude or not values:
+            continue
+        bits = np.bitwise_or.reduce(index["bits"][name][list(values)], axis=0)
+        out = bits if out is None else out & bits
+    return out
+
+
+def popcount(bits: np.ndarray) -> int:
+    return int(_POPCOUNT[bits].sum())
+
+
+def value_counts(index: dict, name: str, bits=None) -> np.ndarray:
+    """Rows per value of ``name`` within ``bits`` (all rows when None)."""
+    attr = index["bits"][name]
+    return _POPCOUNT[attr if bits is None else attr & bits].sum(axis=1)
+
+
+def to_mask(bits: np.ndarray, n: int) -> np.ndarray:
+    return np.unpackbits(bits, count=n).astype(bool)
+
+
+def rows_to_bits(rows, n: int) -> np.ndarray:
+    """Packed bits of a set of row positions (e.g. one course's learners)."""
+    mask = np.zeros(n, dtype=bool)
+    mask[rows] = True
+    return np.packbits(mask)
+
+
+# =========================
+# FILTER PANEL
+# =========================
+def show_bitmap_filters(index: dict, key_prefix: str, attrs=None, base=None, title: str = "🎛️ Lọc học viên"):
+    """
+    Multiselect per attribute with live counts (under the other active filters, within
+    ``base`` bits if given). Returns the packed bits of the selected rows, or None when
+    no filter is active.
+    """
+    attrs = [a for a in (attrs or ATTR_LABELS) if a in index["bits"]]
+    selection = {a: list(st.session_state.get(f"{key_prefix}_{a}", [])) for a in attrs}
+    active = any(selection.values())
+
+    with st.expander(title, expanded=active):
+        cols = st.columns(len(attrs)) if attrs else []
+        for col, name in zip(cols, attrs):
+            labels = index["labels"][name]
+            counts = value_counts(index, name, select(index, selection, exclude=name, base=base))
+            with col:
+                st.multiselect(
+                    ATTR_LABELS[name],
+                    options=list(range(len(labels))),
+                    format_func=lambda i, labels=labels, counts=counts: f"{labels[i]} ({counts[i]:,})",
+                    key=f"{key_prefix}_{name}",
+                    placeholder="Tất cả",
+                )
+        bits = select(index, selection, base=base)
+        n_total = index["n"] if base is None else popcount(base)
+        n_match = n_total if bits is None else popcount(bits)
+        st.caption(f"{n_match:,} / {n_total:,} học viên phù hợp")
+    return bits if active else None
@@ -0,0 +1,89 @@
+"""
+Learner alignment across test phases and phase-to-phase transitions.
+(user_id, course_id) pairs of all phases are factorized once into integer pair codes;
+every phase then stores its label / predict per pair code (-1 = absent), so comparing
+two phases is array indexing plus one bincount, with no merges.
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from modules.data_loader import dataset_version, PHASE_PATH
+from modules.phase_store import PHASES, phase_frame, phase_version
+
+TRANSITION_COLS = ("predict", "label")
+
+
+def align_phases(frames: dict) -> dict:
+    """
+    ``frames`` maps phase -> table with user_id / course_id. Returns the pair labels
+    (``users``, ``courses``, per-pair ``user``/``course`` codes), the pair code of every
+    row of each phase (``rows``) and, for every phase and column of TRANSITION_COLS, an
+    int8 array over pairs with 0/1 or -1 when missing.
+    """
+    users = [f["user_id"].astype(str) for f in frames.values()]
+    courses = [f["course_id"].astype(str) for f in frames.values()]
+    user_codes, user_labels = pd.factorize(pd.concat(users, ignore_index=True))
+    course_codes, course_labels = pd.factorize(pd.concat(courses, ignore_index=True))
+    keys = user_codes.astype(np.int64) * len(course_labels) + course_codes
+    pair_keys, pair_of_row = np.unique(keys, return_inverse=True)
+
+    out = {
+        "users": np.asarray(user_labels, dtype=object),
+        "courses": np.asarray(course_labels, dtype=object),
+        "user": pair_keys // len(course_labels),
+        "course": pair_keys % len(course_labels),
+        "phases": list(frames),
+        "rows": {},
+        "values": {},
+    }
+    start = 0
+    for phase, df in frames.items():
+        rows = pair_of_row[start:start + len(df)]
+        start += len(df)
+        out["rows"][phase] = rows
+        for col in TRANSITION_COLS:
+            values = np.full(len(pair_keys), -1, dtype=np.int8)
+            if col in df.columns:
+                v = pd.to_numeric(df[col], errors="coerce")
+                known = v.notna().to_numpy()
+                values[rows[known]] = (v.to_numpy()[known] > 0).astype(np.int8)
+            out["values"][(phase, col)] = values
+    return out
+
+
+def transitions(align: dict, a: int, b: int, col: str = "predict") -> np.ndarray:
+    """
+    (n_courses, 2, 2) counts of learners going from value i in phase ``a`` to value j in
+    phase ``b`` of ``col``, per course code; only pairs known in both phases count.
+    """
+    va, vb = align["values"][(a, col)], align["values"][(b, col)]
+    both = (va >= 0) & (vb >= 0)
+    cell = align["course"][both] * 4 + va[both] * 2 + vb[both]
+    return np.bincount(cell, minlength=len(align["courses"]) * 4).reshape(-1, 2, 2)
+
+
+def flips(align: dict, a: int, b: int, course_code: int = None, col: str = "predict") -> pd.DataFrame:
+    """Learners whose ``col`` changed between phases ``a`` and ``b`` (optionally in one course)."""
+    va, vb = align["values"][(a, col)], align["values"][(b, col)]
+    hit = (va >= 0) & (vb >= 0) & (va != vb)
+    if course_code is not None:
+        hit &= align["course"] == course_code
+    idx = np.flatnonzero(hit)
+    return pd.DataFrame({
+        "user_id": align["users"][align["user"][idx]],
+        "course_id": align["courses"][align["course"][idx]],
+        "from": va[idx],
+        "to": vb[idx],
+    })
+
+
+def alignment_version() -> str:
+    return dataset_version(*[PHASE_PATH.format(phase=p) for p in PHASES])
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def phase_alignment(version: str) -> dict:
+    """align_phases() over every test phase, built once per dataset version."""
+    frames = {p: phase_frame(p, phase_version(p)) for p in PHASES}
+    return align_phases({p: f for p, f in frames.items() if not f.empty and "user_id" in f.columns})
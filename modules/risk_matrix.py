@@ -0,0 +1,81 @@
+"""
+Course x phase predicted-dropout matrix for the risk heatmap.
+The matrix is one grouped roll-up of the learner cube (course, phase, predict); rows are
+ordered by risk or by similarity (first singular vector of the centered matrix) and
+aggregated into at most ``max_rows`` display rows, weighted by learner counts.
+"""
+import numpy as np
+import streamlit as st
+
+from modules.olap_cube import query
+from modules.phase_store import PHASES
+
+ORDERINGS = {"risk": "Tỷ lệ bỏ học dự đoán", "similarity": "Mức độ tương đồng"}
+MAX_ROWS = 120
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def risk_matrix(_cube, version: str) -> dict:
+    """{"courses", "n" (k, phases) learners with a prediction, "pos" predicted dropouts, "rate"}."""
+    df = query(_cube, by=["course", "phase", "predict"], where={"phase": list(PHASES), "predict": ["0", "1"]})
+    courses, row = np.unique(df["course"].to_numpy(dtype=str), return_inverse=True)
+    col = df["phase"].astype(np.int64).to_numpy() - PHASES[0]
+    shape = (len(courses), len(PHASES))
+    n = np.zeros(shape, dtype=np.int64)
+    pos = np.zeros(shape, dtype=np.int64)
+    np.add.at(n, (row, col), df["count"].to_numpy())
+    hit = (df["predict"] == "1").to_numpy()
+    np.add.at(pos, (row[hit], col[hit]), df["count"].to_numpy()[hit])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rate = pos / n
+    return {"courses": courses.astype(object), "n": n, "pos": pos, "rate": rate}
+
+
+def _fill_nan(rate: np.ndarray) -> np.ndarray:
+    known = ~np.isnan(rate)
+    col_mean = np.where(known, rate, 0.0).sum(axis=0) / np.maximum(known.sum(axis=0), 1)
+    return np.where(known, rate, col_mean)
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def row_order(_matrix, version: str, ordering: str) -> np.ndarray:
+    """
+    Display order of the rows. "risk": overall predicted rate, highest first.
+    "similarity": projection on the first right singular vector of the centered
+    (NaN -> column mean) matrix, so courses with similar phase profiles sit together.
+    """
+    n, pos = _matrix["n"], _matrix["pos"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        overall = pos.sum(axis=1) / n.sum(axis=1)
+    if ordering == "similarity" and len(n) > 1:
+        filled = _fill_nan(_matrix["rate"])
+        centered = filled - filled.mean(axis=0)
+        _, _, vt = np.linalg.svd(centered, full_matrices=False)
+        # hướng của vector kỳ dị là tùy ý: chọn hướng để rủi ro cao nằm trên cùng
+        key = centered @ vt[0]
+        if np.dot(key, np.nan_to_num(overall) - np.nanmean(overall)) < 0:
+            key = -key
+        return np.lexsort((np.arange(len(key)), -key))
+    return np.lexsort((np.arange(len(overall)), -np.nan_to_num(overall), np.isnan(overall)))
+
+
+def downsample(matrix: dict, rows: np.ndarray, max_rows: int = MAX_ROWS) -> dict:
+    """
+    Aggregate ``rows`` (already in display order) into at most ``max_rows`` consecutive
+    groups; each cell is the pooled rate (sum pos / sum n) of its group.
+    """
+    k = len(rows)
+    groups = np.arange(k) * min(max_rows, k) // max(k, 1)
+    n_groups = int(groups[-1]) + 1 if k else 0
+    n = np.stack([np.bincount(groups, weights=matrix["n"][rows, j], minlength=n_groups) for j in range(len(PHASES))], axis=1)
+    pos = np.stack([np.bincount(groups, weights=matrix["pos"][rows, j], minlength=n_groups) for j in range(len(PHASES))], axis=1)
+    size = np.bincount(groups, minlength=n_groups)
+    first = np.r_[0, np.cumsum(size)[:-1]]
+    courses = matrix["courses"][rows]
+    labels = [
+        str(courses[f]) if s == 1 else f"{courses[f]} … {courses[f + s - 1]} ({s})"
+        for f, s in zip(first, size)
+    ]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rate = pos / n
+    return {"rate": rate, "n": n.astype(np.int64), "size": size, "labels": labels}
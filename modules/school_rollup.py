@@ -0,0 +1,68 @@
+"""
+School-level roll-up of the learner cube.
+Per-course aggregates are one bincount per statistic over the cube cells; they are joined
+to schools through the integer course -> school codes with one more bincount, so the cost
+does not depend on how many schools or courses there are.
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from modules.phase_store import PHASES
+
+# tiền tố cột hành vi -> nhãn hiển thị
+ENGAGEMENT = {"num_videos": "Video", "n_attempts": "Bài nộp", "num_events": "Sự kiện"}
+
+
+def course_aggregates(cube: dict, phase: int) -> dict:
+    """
+    Per-course arrays (indexed by cube course code) for one phase (0 = train): learners,
+    label / predict known and positive counts, and the sum of every engagement measure.
+    """
+    n_courses = len(cube["labels"]["course"])
+    codes = cube["codes"]
+    mask = codes["phase"] == cube["labels"]["phase"].index(phase)
+    course, count = codes["course"][mask], cube["count"][mask]
+
+    def _sum(weights):
+        return np.bincount(course, weights=weights, minlength=n_courses)
+
+    out = {"n": _sum(count)}
+    for dim in ("label", "predict"):
+        value = codes[dim][mask]
+        out[f"{dim}_known"] = _sum(count * (value < 2))
+        out[f"{dim}_pos"] = _sum(count * (value == 1))
+    for col, values in cube["measures"].items():
+        out[col] = _sum(values[mask])
+    return out
+
+
+@st.cache_data(show_spinner=False)
+def school_summary(_cube, version: str) -> pd.DataFrame:
+    """
+    One row per school: courses, learners (train), dropout rate (train labels), learners
+    and predicted dropout rate of P5, and mean engagement per learner for every phase.
+    """
+    school_of = _cube["course_school"]
+    n_schools = len(_cube["labels"]["school"])
+
+    def _join(values):
+        return np.bincount(school_of, weights=values, minlength=n_schools)
+
+    train, last = course_aggregates(_cube, 0), course_aggregates(_cube, PHASES[-1])
+    active = (train["n"] + last["n"]) > 0
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        df = pd.DataFrame({
+            "school": np.asarray(_cube["labels"]["school"], dtype=object),
+            "courses": _join(active.astype(np.float64)).astype(np.int64),
+            "learners": _join(train["n"]).astype(np.int64),
+            "dropout_rate": _join(train["label_pos"]) / _join(train["label_known"]),
+            "test_learners": _join(last["n"]).astype(np.int64),
+            "predicted_rate": _join(last["predict_pos"]) / _join(last["predict_known"]),
+        })
+        learners = df["learners"].to_numpy()
+        for col in ENGAGEMENT:
+            for p in PHASES:
+                df[f"{col}_P{p}"] = _join(train[f"{col}_P{p}"]) / learners
+    return df[(df["learners"] + df["test_learners"]) > 0].reset_index(drop=True)
@@ -0,0 +1,177 @@
+"""
+Diacritic-insensitive trigram search index.
+Text is normalized (lowercase, Vietnamese/Latin diacritics stripped, đ → d), split into
+tokens (each CJK character is its own token) and indexed by padded character trigrams.
+Postings are stored CSR-style in NumPy arrays; a query is one bincount over its postings.
+Queries are scored on their unpadded trigrams so partial tokens ("mach", "5843") still
+match; queries too short for trigrams ("ma", "C_58") or without trigram hits fall back
+to a token-prefix / substring scan of the normalized text. Strict searches keep only
+documents where every query token starts a token when there are any, so a correctly
+typed query does not drag in every document that shares a few trigrams.
+"""
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from modules.learner_index import users_frame
+
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af"
+_CJK_RE = re.compile(f"([{_CJK}])")
+_SPLIT_RE = re.compile(f"[^0-9a-z{_CJK}]+")
+
+MIN_MATCH = 0.75  # fraction of query trigrams a document must contain
+TYPO_MIN_MATCH = 0.5  # retried when nothing reaches MIN_MATCH (a typo breaks up to 3 trigrams)
+
+
+def normalize(text) -> str:
+    """Lowercase, strip diacritics (Tiếng Việt → tieng viet) and collapse punctuation."""
+    if text is None or text != text:
+        return ""
+    text = str(text).replace("đ", "d").replace("Đ", "D")
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(_SPLIT_RE.split(_CJK_RE.sub(r" \1 ", text))).strip()
+
+
+def trigrams(norm: str) -> set:
+    """Padded character trigrams of every token of a normalized string."""
+    grams = set()
+    for tok in norm.split():
+        padded = f" {tok} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def query_trigrams(norm: str) -> set:
+    """
+    Unpadded trigrams of the query tokens: a partial token ("mach") shares all of its
+    trigrams with the full one ("machine"), unlike the padded document trigrams.
+    """
+    grams = set()
+    for tok in norm.split():
+        grams.update(tok[i:i + 3] for i in range(len(tok) - 2))
+    return grams
+
+
+def build_ngram_index(texts) -> dict:
+    """Build the index over an iterable of raw strings (document id = position)."""
+    norm = [normalize(t) for t in texts]
+    vocab = {}
+    gram_ids, doc_ids = [], []
+    for doc, text in enumerate(norm):
+        for g in trigrams(text):
+            gram_ids.append(vocab.setdefault(g, len(vocab)))
+            doc_ids.append(doc)
+
+    gram_ids = np.asarray(gram_ids, dtype=np.int64)
+    doc_ids = np.asarray(doc_ids, dtype=np.int32)
+    order = np.argsort(gram_ids, kind="stable")
+    return {
+        "vocab": vocab,
+        "indptr": np.r_[0, np.cumsum(np.bincount(gram_ids, minlength=len(vocab)))],
+        "postings": doc_ids[order],
+        "doc_len": np.bincount(doc_ids, minlength=len(norm)).astype(np.int32),
+        "norm": np.asarray(norm, dtype=object),
+        "n_docs": len(norm),
+    }
+
+
+def search(index: dict, query: str, limit: int = None, min_match: float = MIN_MATCH, strict: bool = True) -> np.ndarray:
+    """
+    Document ids ranked by relevance: exact substring > prefix of a token > trigram
+    similarity (Dice). Documents sharing fewer than ``min_match`` of the query trigrams
+    are dropped; if none are left the threshold is relaxed to TYPO_MIN_MATCH, so small
+    typos still match. With ``strict``, documents where every query token starts a token
+    win outright and the fuzzy tail is only returned when there are none.
+    """
+    q = normalize(query)
+    if not q:
+        return np.arange(0, dtype=np.int64)
+    q_grams = query_trigrams(q)
+    if not q_grams:
+        return substring_search(index, q, limit)
+
+    ids = [index["vocab"][g] for g in q_grams if g in index["vocab"]]
+    indptr, postings = index["indptr"], index["postings"]
+    hits = np.concatenate([postings[indptr[i]:indptr[i + 1]] for i in ids]) if ids else np.empty(0, dtype=np.int32)
+    overlap = np.bincount(hits, minlength=index["n_docs"])
+
+    cand = np.flatnonzero(overlap >= max(1, int(np.ceil(min_match * len(q_grams)))))
+    if not len(cand) and min_match > TYPO_MIN_MATCH:
+        cand = np.flatnonzero(overlap >= max(1, int(np.ceil(TYPO_MIN_MATCH * len(q_grams)))))
+    if not len(cand):
+        return substring_search(index, q, limit)
+    score = 2.0 * overlap[cand] / (len(q_grams) + index["doc_len"][cand])
+
+    # phrase / token-prefix boost, only where every query trigram is present
+    full = np.flatnonzero(overlap[cand] == len(q_grams))
+    padded = " " + q
+    prefix_hit = np.zeros(len(cand), dtype=bool)
+    for i, text in zip(full, index["norm"][cand[full]]):
+        text = " " + text
+        if q in text:
+            score[i] += 2.0 + (1.0 if text.find(padded) >= 0 else 0.0)
+        prefix_hit[i] = all(text.find(" " + tok) >= 0 for tok in q.split())
+    if strict and prefix_hit.any():
+        cand, score = cand[prefix_hit], score[prefix_hit]
+
+    order = np.lexsort((cand, -score))
+    cand = cand[order]
+    return cand[:limit] if limit else cand
+
+
+def substring_search(index: dict, q: str, limit: int = None) -> np.ndarray:
+    """
+    Documents containing the normalized query ``q`` as a substring, those where it starts
+    a token (ID prefixes such as "c 58") first; ties keep document order.
+    """
+    text = pd.Series(index["norm"], dtype=object)
+    hit = np.flatnonzero(text.str.contains(q, regex=False).to_numpy(dtype=bool))
+    if not len(hit):
+        return hit
+    at_token = (" " + text.iloc[hit]).str.contains(" " + q, regex=False).to_numpy(dtype=bool)
+    hit = hit[np.argsort(~at_token, kind="stable")]
+    return hit[:limit] if limit else hit
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def course_search_index(_df, version: str) -> dict:
+    """Index over course_id + course_name, built once per catalog version."""
+    texts = _df["course_id"].astype(str) + " " + _df["course_name"].fillna("").astype(str)
+    return build_ngram_index(texts.tolist())
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def school_search_index(_df, version: str) -> dict:
+    """
+    Index over distinct school names, with course / learner totals per school.
+    ``course_ptr``/``course_rows`` (CSR) give the catalog rows of school i.
+    """
+    schools = _df["school_name"].fillna("").astype(str)
+    codes, names = pd.factorize(schools)
+    index = build_ngram_index(names.tolist())
+    index["names"] = np.asarray(names, dtype=object)
+    index["course_count"] = np.bincount(codes, minlength=len(names))
+    index["course_ptr"] = np.r_[0, np.cumsum(index["course_count"])]
+    index["course_rows"] = np.argsort(codes, kind="stable")
+    user_count = pd.to_numeric(_df["user_count"], errors="coerce").fillna(0).to_numpy()
+    index["user_count"] = np.bincount(codes, weights=user_count, minlength=len(names)).astype(np.int64)
+    return index
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def learner_search_index(version: str) -> dict:
+    """
+    Index over distinct user_ids of the P5 table. ``enroll_ptr``/``enroll_rows`` (CSR)
+    give the row positions of every enrollment of learner i in load_users().
+    """
+    df_users = users_frame(version)
+    codes, ids = pd.factorize(df_users["user_id"].astype(str))
+    index = build_ngram_index(ids.tolist())
+    index["ids"] = np.asarray(ids, dtype=object)
+    index["enroll_ptr"] = np.r_[0, np.cumsum(np.bincount(codes, minlength=len(ids)))]
+    index["enroll_rows"] = np.argsort(codes, kind="stable")
+    return index
@@ -0,0 +1,108 @@
+"""
+Pairwise significance tests between models on the same test phase.
+McNemar on hard predictions (contingency counts for all pairs via one matrix product)
+and DeLong on scores (fast midrank algorithm of Sun & Xu, 2014).
+"""
+import math
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from modules.data_loader import load_prediction_file
+from modules.model_metrics import average_ranks
+
+_erfc = np.vectorize(math.erfc, otypes=[np.float64])
+
+
+def _two_sided_p(z):
+    return _erfc(np.abs(z) / math.sqrt(2.0))
+
+
+def align_predictions(frames: dict) -> dict:
+    """
+    Restrict every model's rows to the learners present in all files, in one common order.
+    Rows are matched on (user_id, course_id) when available, else by position.
+    Returns {"label", "predict" (k, n), "score" (k, n) or None per model}.
+    """
+    models = list(frames)
+    first = frames[models[0]]
+    keyed = all({"user_id", "course_id"} <= set(f.columns) for f in frames.values())
+    if keyed:
+        base = pd.MultiIndex.from_arrays([first["user_id"], first["course_id"]])
+        pos = {m: pd.MultiIndex.from_arrays([f["user_id"], f["course_id"]]).get_indexer(base) for m, f in frames.items()}
+        common = np.logical_and.reduce([p >= 0 for p in pos.values()])
+        pos = {m: p[common] for m, p in pos.items()}
+    else:
+        n = min(len(f) for f in frames.values())
+        pos = {m: np.arange(n) for m in models}
+
+    label = first["label"].to_numpy()[pos[models[0]]]
+    predict = np.stack([frames[m]["predict"].to_numpy()[pos[m]] for m in models])
+    score = {m: frames[m]["score"].to_numpy()[pos[m]] if "score" in frames[m].columns else None for m in models}
+    return {"models": models, "label": label, "predict": predict, "score": score}
+
+
+def mcnemar_matrix(label, predict) -> dict:
+    """
+    McNemar test (continuity-corrected chi-square, 1 dof) for every pair of models.
+    ``predict`` is (k, n); b[i, j] = #rows model i got right and model j got wrong.
+    """
+    correct = (np.asarray(predict) == np.asarray(label)[None, :]).astype(np.float64)
+    b = correct @ (1.0 - correct).T
+    disc = b + b.T
+    with np.errstate(invalid="ignore", divide="ignore"):
+        stat = np.where(disc > 0, (np.abs(b - b.T) - 1.0).clip(min=0) ** 2 / disc, 0.0)
+    p = _erfc(np.sqrt(stat / 2.0))
+    np.fill_diagonal(p, np.nan)
+    return {"b": b.astype(np.int64), "stat": stat, "p": p, "acc": correct.mean(axis=1)}
+
+
+def delong_matrix(label, scores) -> dict:
+    """
+    AUCs, DeLong covariance and pairwise p-values for (k, n) ``scores`` on the same rows.
+    Midranks are computed once per model over positives, negatives and all rows.
+    """
+    label = np.asarray(label) == 1
+    scores = np.asarray(scores, dtype=np.float64)
+    pos, neg = scores[:, label], scores[:, ~label]
+    m, n = pos.shape[1], neg.shape[1]
+    k = scores.shape[0]
+    if m < 2 or n < 2:
+        nan = np.full((k, k), np.nan)
+        return {"auc": np.full(k, np.nan), "cov": nan, "z": nan, "p": nan}
+
+    tx = np.stack([average_ranks(r) for r in pos])
+    ty = np.stack([average_ranks(r) for r in neg])
+    tz = np.stack([average_ranks(r) for r in np.hstack([pos, neg])])
+    auc = tz[:, :m].sum(axis=1) / m / n - (m + 1.0) / (2.0 * n)
+    v01 = (tz[:, :m] - tx) / n
+    v10 = 1.0 - (tz[:, m:] - ty) / m
+    cov = np.atleast_2d(np.cov(v01)) / m + np.atleast_2d(np.cov(v10)) / n
+
+    var = np.diag(cov)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = (auc[:, None] - auc[None, :]) / np.sqrt(var[:, None] + var[None, :] - 2.0 * cov)
+    p = _two_sided_p(z)
+    np.fill_diagonal(p, np.nan)
+    return {"auc": auc, "cov": cov, "z": z, "p": p}
+
+
+@st.cache_data(show_spinner=False)
+def pairwise_tests(files: tuple) -> dict:
+    """
+    McNemar and DeLong results for one phase; ``files`` is ((model, path, digest), ...),
+    so the cache is keyed on every file's content hash.
+    """
+    frames = {model: load_prediction_file(path, digest) for model, path, digest in files}
+    aligned = align_predictions(frames)
+    out = {
+        "models": aligned["models"],
+        "n": len(aligned["label"]),
+        "mcnemar": mcnemar_matrix(aligned["label"], aligned["predict"]),
+        "delong": None,
+    }
+    scored = [m for m in aligned["models"] if aligned["score"][m] is not None]
+    if len(scored) >= 2:
+        out["delong"] = {"models": scored, **delong_matrix(aligned["label"], np.stack([aligned["score"][m] for m in scored]))}
+    return out
@@ -0,0 +1,56 @@
+"""
+Nearest-neighbour lookup of similar learners on the P1-P5 behaviour features.
+Features of the P5 table (load_users()) are standardized once into a float32 matrix;
+KD-trees are built lazily per course (LRU-bounded resource cache) and once for the
+whole table, so a query is a single tree search.
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+from sklearn.neighbors import KDTree
+
+from modules.learner_index import MAX_CACHED_COURSES, rows_for_course, users_frame
+from modules.phase_store import PHASES
+
+FEATURE_PREFIXES = ("num_events", "n_attempts", "num_videos", "n_comments", "num_active_days", "accuracy_rate")
+N_SIMILAR = 20
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def feature_matrix(version: str) -> dict:
+    """
+    {"X": (n, d) float32 z-scores, "cols"} over every ``<prefix>_P<i>`` column present;
+    missing values sit at the column mean (0) and constant columns stay 0.
+    """
+    df_users = users_frame(version)
+    cols = [f"{c}_P{i}" for c in FEATURE_PREFIXES for i in PHASES if f"{c}_P{i}" in df_users.columns]
+    X = df_users[cols].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+    mean = np.nanmean(X, axis=0) if len(X) else np.zeros(len(cols))
+    std = np.nanstd(X, axis=0) if len(X) else np.ones(len(cols))
+    X = (X - mean) / np.where(std > 0, std, 1.0)
+    return {"X": np.nan_to_num(X).astype(np.float32), "cols": cols}
+
+
+@st.cache_resource(max_entries=MAX_CACHED_COURSES, show_spinner=False)
+def course_tree(course_id: str, version: str) -> dict:
+    """KD-tree over the learners of one course; ``rows`` maps tree points to load_users() rows."""
+    rows = rows_for_course(course_id, version)
+    return {"rows": rows, "tree": KDTree(feature_matrix(version)["X"][rows])}
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def global_tree(version: str) -> dict:
+    """KD-tree over every learner of the P5 table."""
+    X = feature_matrix(version)["X"]
+    return {"rows": np.arange(len(X)), "tree": KDTree(X)}
+
+
+def similar(index: dict, X: np.ndarray, row: int, k: int = N_SIMILAR):
+    """(rows, distances) of the ``k`` nearest learners to load_users() row ``row``, itself excluded."""
+    n = len(index["rows"])
+    if n <= 1:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    dist, idx = index["tree"].query(X[row:row + 1], k=min(k + 1, n))
+    rows = index["rows"][idx[0]]
+    keep = rows != row
+    return rows[keep][:k], dist[0][keep][:k]
@@ -0,0 +1,112 @@
+"""
+Kaplan-Meier style "still active" curves over the test phases.
+A learner's event is the first phase whose label is 1; learners never labelled 1 are
+censored after their last observed phase, and learners first seen in a later phase
+enter the risk set there. Entries, events and exits of every group are one bincount
+each, so the curves of all courses (or cohorts) come out of a single pass.
+"""
+import numpy as np
+import plotly.graph_objects as go
+import streamlit as st
+
+from modules.phase_store import phase_frame, phase_version
+from modules.phase_transitions import phase_alignment
+from modules.time_series import enroll_days
+
+
+def event_times(align: dict) -> dict:
+    """Per pair: first / last observed phase index, event phase index and event flag."""
+    phases = align["phases"]
+    labels = np.stack([align["values"][(p, "label")] for p in phases], axis=1)
+    known = labels >= 0
+    observed = known.any(axis=1)
+    first = np.argmax(known, axis=1)
+    last = len(phases) - 1 - np.argmax(known[:, ::-1], axis=1)
+    dropped = labels == 1
+    event = dropped.any(axis=1)
+    time = np.where(event, np.argmax(dropped, axis=1), last)
+    return {"observed": observed, "first": first, "time": time, "event": event}
+
+
+def km_curves(times: dict, groups: np.ndarray, n_groups: int, n_phases: int) -> dict:
+    """
+    Survival per group and phase: S[g, t] = prod_{s<=t} (1 - d[g, s] / n[g, s]), where
+    n is the number of learners at risk in phase s and d the number dropping out there.
+    """
+    ok = times["observed"] & (groups >= 0)
+    g, first, time, event = groups[ok], times["first"][ok], times["time"][ok], times["event"][ok]
+    size = n_groups * n_phases
+
+    def _count(t, mask=None):
+        cell = g * n_phases + t
+        return np.bincount(cell if mask is None else cell[mask], minlength=size).reshape(n_groups, n_phases)
+
+    entries = _count(first).cumsum(axis=1)
+    exits = _count(time).cumsum(axis=1)
+    at_risk = entries - np.hstack([np.zeros((n_groups, 1), dtype=np.int64), exits[:, :-1]])
+    deaths = _count(time, event)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        hazard = np.where(at_risk > 0, deaths / np.maximum(at_risk, 1), 0.0)
+    return {"survival": np.cumprod(1.0 - hazard, axis=1), "at_risk": at_risk, "events": deaths, "n": entries[:, -1]}
+
+
+def _curves(align: dict, groups: np.ndarray, labels) -> dict:
+    out = km_curves(event_times(align), groups, len(labels), len(align["phases"]))
+    out["labels"] = np.asarray(labels, dtype=object)
+    out["phases"] = list(align["phases"])
+    return out
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def course_survival(version: str) -> dict:
+    """Curves of every course plus the whole catalog (``overall``), once per version."""
+    align = phase_alignment(version)
+    out = _curves(align, align["course"], align["courses"])
+    out["overall"] = _curves(align, np.zeros(len(align["course"]), dtype=np.int64), ["Tất cả khóa học"])
+    return out
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def cohort_survival(version: str) -> dict:
+    """Curves per enrollment cohort (enroll month, "YYYY-MM"), once per version."""
+    align = phase_alignment(version)
+    month = np.full(len(align["course"]), np.iinfo(np.int64).min)
+    for phase, rows in align["rows"].items():
+        days = enroll_days(phase_frame(phase, phase_version(phase)))
+        known = days >= 0
+        month[rows[known]] = days[known].astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    valid = month > np.iinfo(np.int64).min
+    cohorts, codes = np.unique(month[valid], return_inverse=True)
+    groups = np.full(len(month), -1, dtype=np.int64)
+    groups[valid] = codes
+    return _curves(align, groups, [str(m) for m in cohorts.astype("datetime64[M]")])
+
+
+def show_survival_chart(curves: list, title: str, colors: dict, key: str = None) -> None:
+    """
+    Overlay step curves; ``curves`` is [(name, survival over phases, at_risk, dashed)].
+    Every curve starts at 100% before the first phase.
+    """
+    fig = go.Figure()
+    for name, survival, at_risk, dashed in curves:
+        x = ["Bắt đầu", *[f"P{p}" for p in range(1, len(survival) + 1)]]
+        fig.add_trace(go.Scatter(
+            x=x,
+            y=np.r_[1.0, survival] * 100,
+            customdata=np.r_[at_risk[0], at_risk],
+            name=str(name),
+            mode="lines+markers",
+            line=dict(shape="hv", width=2 if dashed else 3, dash="dash" if dashed else None),
+            hovertemplate="%{x}: %{y:.1f}% còn học<br>Đang theo dõi: %{customdata:,}<extra>%{fullData.name}</extra>",
+        ))
+    fig.update_layout(
+        title=dict(text=f"<b>{title}</b>", font=dict(size=22, color=colors["text"])),
+        paper_bgcolor=colors["bg"],
+        plot_bgcolor=colors["bg"],
+        font=dict(color=colors["text"], size=16),
+        yaxis=dict(title="Còn học (%)", range=[0, 102], gridcolor=colors["grid"]),
+        xaxis=dict(gridcolor=colors["grid"]),
+        legend=dict(font=dict(color=colors["text"])),
+        height=440,
+    )
+    st.plotly_chart(fig, use_container_width=True, theme=None, key=key)
@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+from urllib.parse import quote
+
+from modules.data_loader import load_courses, dataset_version, COURSES_PATH, USERS_PATH
+from modules.learner_index import users_frame
+from modules.search_index import course_search_index, school_search_index, learner_search_index, search
+
+# Tìm kiếm toàn cục chấp nhận lỗi gõ nhiều hơn ô tìm kiếm của trang Khóa học
+GLOBAL_MIN_MATCH = 0.4
+MAX_RESULTS = 200
+
+
+def _course_link(course_id, theme: str) -> str:
+    return f"?page=dashboard&course_id={quote(str(course_id))}&theme={theme}"
+
+
+def _user_link(user_id, course_id, theme: str) -> str:
+    return f"?page=dashboard&course_id={quote(str(course_id))}&user_id={quote(str(user_id))}&theme={theme}"
+
+
+def _csr_rows(ptr: np.ndarray, rows: np.ndarray, ids: np.ndarray) -> np.ndarray:
+    """Concatenate the CSR slices of ``ids`` (in the given order)."""
+    if not len(ids):
+        return np.empty(0, dtype=np.int64)
+    return np.concatenate([rows[ptr[i]:ptr[i + 1]] for i in ids])
+
+
+def _course_table(df_courses: pd.DataFrame, rows: np.ndarray, theme: str) -> None:
+    df_show = df_courses.iloc[rows][["course_id", "course_name", "school_name", "user_count"]]
+    df_show = df_show.assign(link=[_course_link(c, theme) for c in df_show["course_id"]])
+    st.dataframe(
+        df_show,
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "course_id": None,
+            "course_name": "Tên khóa học",
+            "school_name": "Trường",
+            "user_count": st.column_config.NumberColumn("Học viên", format="%d"),
+            "link": st.column_config.LinkColumn("Mã khóa học", display_text=r"course_id=([^&]+)"),
+        },
+    )
+
+
+def show(df_courses=None, theme: str = "Light") -> None:
+    """Trang kết quả tìm kiếm: ?page=search&q=<từ khóa>"""
+    query = str(st.query_params.get("q", "")).strip()
+    st.title("🔎 Tìm kiếm")
+
+    if not query:
+        st.info("Nhập từ khóa ở thanh bên để tìm khóa học, trường hoặc học viên.")
+        return
+
+    if df_courses is None:
+        df_courses = load_courses()
+    df_users = users_frame(dataset_version(USERS_PATH))
+    if df_courses.empty and df_users.empty:
+        st.warning("Không có dữ liệu để tìm kiếm.")
+        return
+
+    course_idx = course_search_index(df_courses, dataset_version(COURSES_PATH))
+    school_idx = school_search_index(df_courses, dataset_version(COURSES_PATH))
+    learner_idx = learner_search_index(dataset_version(USERS_PATH))
+
+    course_hits = search(course_idx, query, min_match=GLOBAL_MIN_MATCH, strict=False)
+    school_hits = search(school_idx, query, min_match=GLOBAL_MIN_MATCH, strict=False)
+    learner_hits = search(learner_idx, query, min_match=GLOBAL_MIN_MATCH, strict=False)
+
+    st.markdown(
+        f"Kết quả cho **“{query}”**: {len(course_hits):,} khóa học · {len(school_hits):,} trường · {len(learner_hits):,} học viên"
+    )
+    if not (len(course_hits) or len(school_hits) or len(learner_hits)):
+        st.info("Không tìm thấy kết quả phù hợp.")
+        return
+
+    tab_course, tab_school, tab_user = st.tabs([
+        f"📚 Khóa học ({len(course_hits):,})",
+        f"🏫 Trường ({len(school_hits):,})",
+        f"👤 Học viên ({len(learner_hits):,})",
+    ])
+
+    with tab_course:
+        if len(course_hits):
+            _course_table(df_courses, course_hits[:MAX_RESULTS], theme)
+            if len(course_hits) > MAX_RESULTS:
+                st.caption(f"Hiển thị {MAX_RESULTS} kết quả phù hợp nhất.")
+        else:
+            st.info("Không có khóa học phù hợp.")
+
+    with tab_school:
+        if len(school_hits):
+            top = school_hits[:MAX_RESULTS]
+            df_school = pd.DataFrame({
+                "Trường": school_idx["names"][top],
+                "Số khóa học": school_idx["course_count"][top],
+                "Số học viên": school_idx["user_count"][top],
+            })
+            st.dataframe(df_school, use_container_width=True, hide_index=True)
+
+            selected = st.selectbox("Xem khóa học của trường", range(len(top)), format_func=lambda i: school_idx["names"][top[i]], key="search_school_pick")
+            _course_table(df_courses, _csr_rows(school_idx["course_ptr"], school_idx["course_rows"], top[[selected]]), theme)
+        else:
+            st.info("Không có trường phù hợp.")
+
+    with tab_user:
+        if len(learner_hits):
+            top = learner_hits[:MAX_RESULTS]
+            rows = _csr_rows(learner_idx["enroll_ptr"], learner_idx["enroll_rows"], top)
+            cols = [c for c in ["user_id", "course_id", "enroll_time", "predict"] if c in df_users.columns]
+            df_show = df_users.iloc[rows][cols]
+            df_show = df_show.assign(link=[_user_link(u, c, theme) for u, c in zip(df_show["user_id"], df_show["course_id"])])
+            st.dataframe(
+                df_show,
+                use_container_width=True,
+                hide_index=True,
+                column_config={
+                    "user_id": None,
+                    "course_id": "Khóa học",
+                    "enroll_time": "Ngày đăng ký",
+                    "predict": st.column_config.CheckboxColumn("Dự đoán bỏ học"),
+                    "link": st.column_config.LinkColumn("Học viên", display_text=r"user_id=([^&]+)"),
+                },
+            )
+            if len(learner_hits) > MAX_RESULTS:
+                st.caption(f"Hiển thị {MAX_RESULTS} học viên phù hợp nhất.")
+        else:
+            st.info("Không có học viên phù hợp.")
@@ -0,0 +1,93 @@
+"""
+Enrollment / dropout time series backed by daily prefix sums.
+cum_*[i] counts the rows enrolled before day0 + i, so any [a, b) range is one
+subtraction and a series at any granularity is one gather at the bucket edges.
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+GRANULARITIES = {"Ngày": "D", "Tuần": "W", "Tháng": "M"}
+
+
+def enroll_days(df: pd.DataFrame) -> np.ndarray:
+    """
+    Enrollment day number per row: enroll_time, else the 1st of start_year/start_month;
+    -1 when neither is usable.
+    """
+    n = len(df)
+    days = pd.Series(pd.NaT, index=df.index, dtype="datetime64[ns]")
+    if "enroll_time" in df.columns:
+        days = pd.to_datetime(df["enroll_time"], errors="coerce")
+    if {"start_year", "start_month"} <= set(df.columns) and days.isna().any():
+        fallback = pd.to_datetime(
+            pd.DataFrame({"year": df["start_year"], "month": df["start_month"], "day": 1}), errors="coerce"
+        )
+        days = days.fillna(fallback)
+    out = np.full(n, -1, dtype=np.int64)
+    valid = days.notna().to_numpy()
+    out[valid] = days[valid].to_numpy(dtype="datetime64[D]").astype(np.int64)
+    return out
+
+
+def daily_cumulative(days: np.ndarray, label=None) -> dict:
+    """Prefix sums of enrollments (and dropouts if ``label`` is given) per calendar day."""
+    valid = days >= 0
+    if not valid.any():
+        return {"day0": 0, "n_days": 0, "cum_enroll": np.zeros(1, dtype=np.int64), "cum_drop": None}
+    day0 = int(days[valid].min())
+    offset = days[valid] - day0
+    n_days = int(offset.max()) + 1
+    out = {
+        "day0": day0,
+        "n_days": n_days,
+        "cum_enroll": np.r_[0, np.cumsum(np.bincount(offset, minlength=n_days))],
+        "cum_drop": None,
+    }
+    if label is not None:
+        drop = np.asarray(label, dtype=np.float64)[valid]
+        out["cum_drop"] = np.r_[0, np.cumsum(np.bincount(offset, weights=np.nan_to_num(drop), minlength=n_days))].astype(np.int64)
+    return out
+
+
+def bucket_edges(first_day: int, last_day: int, granularity: str = "M") -> np.ndarray:
+    """
+    Day numbers of bucket starts covering [first_day, last_day], plus the end edge.
+    Weeks start on Monday and months on the 1st; the first bucket is clipped to first_day.
+    """
+    first, last = np.datetime64(int(first_day), "D"), np.datetime64(int(last_day), "D")
+    if granularity == "D":
+        edges = np.arange(first, last + 1)
+    elif granularity == "W":
+        # 1970-01-01 là thứ Năm: lùi về thứ Hai
+        monday = first - ((first.astype(np.int64) + 3) % 7)
+        edges = np.arange(monday, last + 1, 7)
+    else:
+        edges = np.arange(first.astype("datetime64[M]"), last.astype("datetime64[M]") + 1).astype("datetime64[D]")
+    edges = np.maximum(edges.astype(np.int64), int(first_day))
+    return np.r_[edges, int(last_day) + 1]
+
+
+def range_counts(ts: dict, edges: np.ndarray, key: str = "cum_enroll") -> np.ndarray:
+    """Rows per bucket [edges[i], edges[i+1]), O(1) per bucket."""
+    idx = np.clip(np.asarray(edges) - ts["day0"], 0, ts["n_days"])
+    cum = ts[key]
+    return cum[idx[1:]] - cum[idx[:-1]]
+
+
+def rolling_rate(ts: dict, edges: np.ndarray, window: int) -> np.ndarray:
+    """Dropout rate over the last ``window`` buckets ending at each bucket (NaN if empty)."""
+    idx = np.clip(np.asarray(edges) - ts["day0"], 0, ts["n_days"])
+    lo = idx[np.maximum(np.arange(1, len(idx)) - window, 0)]
+    hi = idx[1:]
+    enrolled = ts["cum_enroll"][hi] - ts["cum_enroll"][lo]
+    dropped = ts["cum_drop"][hi] - ts["cum_drop"][lo]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(enrolled > 0, dropped / enrolled, np.nan)
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def enrollment_series(_df, version: str) -> dict:
+    """daily_cumulative() of a learner table (label = dropout), built once per version."""
+    label = _df["label"].to_numpy() if "label" in _df.columns else None
+    return daily_cumulative(enroll_days(_df), label)
@@ -1,8 +1,18 @@
+import numpy as np
 import streamlit as st
-import pandas as pd
 import plotly.graph_objects as go
+from datetime import date, timedelta
 from urllib.parse import quote  # ✅ thêm để encode course_id an toàn
 
+from modules.data_loader import dataset_version, TRAIN_PATH
+from modules.cohorts import retention_matrix
+from modules.leaderboard import METRICS, cube_course_counts, leaderboard
+from modules.olap_cube import cube_version, learner_cube, query
+from modules.phase_store import PHASES
+from modules.phase_transitions import alignment_version
+from modules.survival import cohort_survival, show_survival_chart
+from modules.time_series import GRANULARITIES, bucket_edges, enrollment_series, range_counts, rolling_rate
+
 
 def show(df, theme='Light'):
     """Display the overview page with theme support"""
@@ -19,11 +29,16 @@ def show(df, theme='Light'):
 
     col1, col2, col3, col4 = st.columns(4)
 
-    # Calculate metrics
+    # Calculate metrics: tổng hợp từ cube (phase 0 = huấn luyện)
+    cube = learner_cube(cube_version())
+    train_by_label = query(cube, by=["label"], where={"phase": 0}).set_index("label")["count"]
+    # số học viên khác nhau không cộng dồn được qua các ô của cube -> đếm trên bảng gốc
     total_students = df['user_id'].nunique()
-    total_courses = df['course_id'].nunique()
-    total_enrollments = len(df)
-    dropout_rate = df['label'].mean() * 100 if 'label' in df.columns else 0
+    train_courses = query(cube, by=["course"], where={"phase": 0})["course"]
+    total_courses = int((train_courses != "N/A").sum())
+    total_enrollments = int(train_by_label.sum())
+    labelled = int(train_by_label.get("0", 0) + train_by_label.get("1", 0))
+    dropout_rate = train_by_label.get("1", 0) / labelled * 100 if labelled else 0
 
     with col1:
         st.markdown(f"""
@@ -63,61 +78,119 @@ def show(df, theme='Light'):
     col1, col2 = st.columns([2, 1])
 
     with col1:
-        # Trend chart
-        df_trend = df.groupby(['start_year', 'start_month']).size().reset_index(name='count')
-        df_trend = df_trend.sort_values(['start_year', 'start_month'])
+        # Trend chart: prefix sums theo ngày, mỗi bucket chỉ là 1 phép trừ
+        ts = enrollment_series(df, dataset_version(TRAIN_PATH))
+        if ts["n_days"] == 0:
+            st.info("Không có dữ liệu ngày đăng ký để vẽ xu hướng.")
+        else:
+            first_day = date(1970, 1, 1) + timedelta(days=ts["day0"])
+            last_day = first_day + timedelta(days=ts["n_days"] - 1)
 
-        df_trend['date_label'] = df_trend.apply(
-            lambda x: f"{int(x['start_year'])}-{int(x['start_month']):02d}",
-            axis=1
-        )
+            col_gran, col_roll = st.columns([2, 1])
+            with col_gran:
+                gran_label = st.radio("Độ chi tiết", list(GRANULARITIES), index=2, horizontal=True, key="trend_granularity")
+            with col_roll:
+                window = st.number_input(
+                    "Cửa sổ tỷ lệ bỏ học (số bucket)", min_value=1, max_value=52, value=3, step=1,
+                    key="trend_window", disabled=ts["cum_drop"] is None,
+                )
+            if first_day < last_day:
+                date_from, date_to = st.slider(
+                    "Khoảng thời gian", min_value=first_day, max_value=last_day,
+                    value=(first_day, last_day), format="DD/MM/YYYY", key="trend_range",
+                )
+            else:
+                date_from, date_to = first_day, last_day
 
-        fig_trend = go.Figure()
-        fig_trend.add_trace(go.Scatter(
-            x=df_trend['date_label'],
-            y=df_trend['count'],
-            mode='lines+markers',
-            name='2019',
-            line=dict(color='#ed8936', width=2),
-            marker=dict(size=6)
-        ))
+            edges = bucket_edges(
+                (date_from - date(1970, 1, 1)).days, (date_to - date(1970, 1, 1)).days, GRANULARITIES[gran_label]
+            )
+            x = edges[:-1].astype("datetime64[D]")
 
-        fig_trend.update_layout(
-            plot_bgcolor=bg_color,
-            paper_bgcolor=bg_color,
-            font=dict(color=text_color),
-            title=dict(
-                text='Số lượng học viên đăng ký khóa học theo thời gian',
-                font=dict(size=18, color=text_color, family='Arial, sans-serif'),
-                x=0.02,
-                xanchor='left'
-            ),
-            xaxis=dict(
-                showgrid=True,
-                gridcolor=grid_color,
-                title='',
-                tickfont=dict(color=text_color)
-            ),
-            yaxis=dict(
-                showgrid=True,
-                gridcolor=grid_color,
-                title='',
-                tickfont=dict(color=text_color)
-            ),
-            height=600,
-            margin=dict(l=10, r=10, t=50, b=10)
-        )
+            fig_trend = go.Figure()
+            fig_trend.add_trace(go.Scatter(
+                x=x,
+                y=range_counts(ts, edges),
+                mode='lines+markers',
+                name='Lượt đăng ký',
+                line=dict(color='#ed8936', width=2),
+                marker=dict(size=6)
+            ))
+            if ts["cum_drop"] is not None:
+                fig_trend.add_trace(go.Scatter(
+                    x=x,
+                    y=range_counts(ts, edges, "cum_drop"),
+                    mode='lines',
+                    name='Bỏ học',
+                    line=dict(color='#4299e1', width=2),
+                ))
+                fig_trend.add_trace(go.Scatter(
+                    x=x,
+                    y=rolling_rate(ts, edges, int(window)) * 100,
+                    mode='lines',
+                    name=f'Tỷ lệ bỏ học (trượt {int(window)})',
+                    line=dict(color='#48bb78', width=2, dash='dot'),
+                    yaxis='y2',
+                ))
+
+            fig_trend.update_layout(
+                plot_bgcolor=bg_color,
+                paper_bgcolor=bg_color,
+                font=dict(color=text_color),
+                title=dict(
+                    text='Số lượng học viên đăng ký khóa học theo thời gian',
+                    font=dict(size=18, color=text_color, family='Arial, sans-serif'),
+                    x=0.02,
+                    xanchor='left'
+                ),
+                xaxis=dict(
+                    showgrid=True,
+                    gridcolor=grid_color,
+                    title='',
+                    tickfont=dict(color=text_color)
+                ),
+                yaxis=dict(
+                    showgrid=True,
+                    gridcolor=grid_color,
+                    title='',
+                    tickfont=dict(color=text_color)
+                ),
+                yaxis2=dict(
+                    overlaying='y',
+                    side='right',
+                    showgrid=False,
+                    range=[0, 100],
+                    ticksuffix='%',
+                    tickfont=dict(color=text_color)
+                ),
+                legend=dict(orientation='h', yanchor='bottom', y=1.0, xanchor='right', x=1, font=dict(color=text_color)),
+                height=600,
+                margin=dict(l=10, r=10, t=50, b=10)
+            )
 
-        st.plotly_chart(fig_trend, use_container_width=True)
+            st.plotly_chart(fig_trend, use_container_width=True)
 
     with col2:
-        # Top 5 table
-        if 'label' in df.columns:
-            dropout_df = df[df['label'] == 1]
-            top_courses = dropout_df.groupby('course_id').size().reset_index(name='dropout_count')
-            top_courses = top_courses.nlargest(5, 'dropout_count')
-        else:
-            top_courses = pd.DataFrame(columns=['course_id', 'dropout_count'])
+        # Top-K table: đếm theo khóa học tính sẵn / nguồn dữ liệu, xếp hạng bằng argpartition
+        col_metric, col_source = st.columns(2)
+        with col_metric:
+            metric = st.selectbox("Xếp hạng theo", list(METRICS), format_func=lambda m: METRICS[m][0], key="top_metric")
+        with col_source:
+            source = st.selectbox(
+                "Dữ liệu", [0, *PHASES],
+                format_func=lambda p: "Huấn luyện" if p == 0 else f"Giai đoạn {p}", key="top_source",
+            )
+        col_k, col_support = st.columns(2)
+        with col_k:
+            top_n = int(st.number_input("Số khóa học (K)", min_value=1, max_value=100, value=5, step=1, key="top_k"))
+        with col_support:
+            min_support = int(st.number_input("Số học viên tối thiểu", min_value=1, value=1, step=10, key="top_min_support"))
+
+        counts = cube_course_counts(cube, cube_version(), source)
+        top_courses = leaderboard(counts, metric, top_n, min_support)
+        if counts.get(metric) is None:
+            st.info("Dữ liệu này không có cột cần thiết cho tiêu chí đã chọn.")
+        metric_label, is_rate = METRICS[metric]
 
         table_html = f"""<style>
 .ranking-container {{
@@ -197,13 +270,13 @@ def show(df, theme='Light'):
 }}
 </style>
 <div class="ranking-container">
-    <div class="ranking-title">Bảng xếp hạng khóa học bỏ học cao nhất</div>
+    <div class="ranking-title">Top {top_n} khóa học theo {metric_label.lower()}</div>
     <table class="ranking-table">
         <thead>
             <tr>
                 <th style="width: 15%; text-align: center;">#</th>
                 <th style="width: 50%;">Mã khóa học</th>
-                <th style="width: 35%;">SỐ LƯỢNG BỎ HỌC</th>
+                <th style="width: 35%;">{metric_label.upper()}</th>
             </tr>
         </thead>
         <tbody>
@@ -223,7 +296,7 @@ def show(df, theme='Light'):
         <div class="course-code" style="cursor: pointer;">{course_id}</div>
     </a>
 </td>
-<td><div class="enrollment-badge">{int(row['dropout_count']):,}</div></td>
+<td><div class="enrollment-badge">{f"{row['value']:.1%}" if is_rate else f"{int(row['value']):,}"}</div></td>
 </tr>"""
 
         table_html += """
@@ -238,8 +311,8 @@ def show(df, theme='Light'):
     # Second row
     st.markdown('<div style="height: 30px;"></div>', unsafe_allow_html=True)
     
-    dropout = df['label'].sum()
-    continue_study = len(df) - dropout
+    dropout = int(train_by_label.get("1", 0))
+    continue_study = int(train_by_label.get("0", 0))
 
     labels_pie = ['Không bỏ học', 'Bỏ học']
     values_pie = [continue_study, dropout]
@@ -255,7 +328,7 @@ def show(df, theme='Light'):
         textfont=dict(color=text_color, size=22, family='Arial, sans-serif')
     )])
 
-    total_count = len(df)
+    total_count = dropout + continue_study
 
     fig_pie.update_layout(
         plot_bgcolor=bg_color,
@@ -287,3 +360,59 @@ def show(df, theme='Light'):
     )
 
     st.plotly_chart(fig_pie, use_container_width=True)
+
+    # Lưới giữ chân theo nhóm đăng ký: hàng = tháng đăng ký, cột = giai đoạn
+    st.markdown('<div style="height: 30px;"></div>', unsafe_allow_html=True)
+    st.markdown('<p style="font-size: 28px; font-weight: bold;">Tỷ lệ giữ chân theo nhóm đăng ký</p>', unsafe_allow_html=True)
+    all_label = "Tất cả"
+    col_school, col_course = st.columns(2)
+    with col_school:
+        school = st.selectbox("Trường", [all_label, *sorted(cube["labels"]["school"])], key="cohort_school")
+    course_labels = np.asarray(cube["labels"]["course"], dtype=object)
+    if school != all_label:
+        course_labels = course_labels[cube["course_school"] == cube["labels"]["school"].index(school)]
+    with col_course:
+        course = st.selectbox("Khóa học", [all_label, *sorted(course_labels)], key="cohort_course")
+    grid = retention_matrix(
+        cube, cube_version(),
+        None if school == all_label else school,
+        None if course == all_label else course,
+    )
+    if grid.empty:
+        st.info("Không có học viên huấn luyện cho lựa chọn này.")
+    else:
+        phase_cols = [f"P{p}" for p in PHASES]
+        z = grid[phase_cols].to_numpy() * 100
+        fig_grid = go.Figure(go.Heatmap(
+            z=z,
+            x=[f"Giai đoạn {p}" for p in PHASES],
+            y=grid["cohort"],
+            text=np.round(z, 1),
+            texttemplate="%{text}%",
+            customdata=np.repeat(grid["size"].to_numpy()[:, None], len(PHASES), axis=1),
+            colorscale="Blues",
+            zmin=0,
+            zmax=100,
+            colorbar=dict(title="%"),
+            hovertemplate="Nhóm %{y} · %{x}<br>Còn hoạt động: %{z:.1f}%<br>Số học viên: %{customdata:,}<extra></extra>",
+        ))
+        fig_grid.update_layout(
+            paper_bgcolor=bg_color,
+            plot_bgcolor=bg_color,
+            font=dict(color=text_color, size=14),
+            yaxis=dict(autorange="reversed", type="category", title="Tháng đăng ký"),
+            height=min(900, 160 + 26 * len(grid)),
+            margin=dict(l=20, r=20, t=20, b=40),
+        )
+        st.plotly_chart(fig_grid, use_container_width=True, theme=None)
+        st.caption("Ô = tỷ lệ học viên của nhóm có ngày hoạt động trong giai đoạn (num_active_days > 0), dữ liệu huấn luyện.")
+
+    # Đường cong duy trì theo nhóm tháng đăng ký (Kaplan–Meier trên nhãn từng giai đoạn)
+    st.markdown('<div style="height: 30px;"></div>', unsafe_allow_html=True)
+    cohorts = cohort_survival(alignment_version())
+    if len(cohorts["labels"]):
+        labels = list(cohorts["labels"])
+        picked = st.multiselect("Nhóm đăng ký (tháng)", labels, default=labels[-4:], key="survival_cohorts", max_selections=12)
+        lookup = {c: i for i, c in enumerate(labels)}
+        lines = [(c, cohorts["survival"][lookup[c]], cohorts["at_risk"][lookup[c]], False) for c in picked]
+        show_survival_chart(lines, "Tỷ lệ còn theo học qua các giai đoạn theo nhóm đăng ký", {"bg": bg_color, "text": text_color, "grid": grid_color})
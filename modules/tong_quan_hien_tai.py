@@ -1,8 +1,15 @@
+import numpy as np
 import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from modules.data_loader import load_test_predictions, load_users, load_courses
+from urllib.parse import quote
+from modules.data_loader import load_courses
+from modules.funnel import STAGES, engagement_funnel
+from modules.olap_cube import cube_version, learner_cube, query
+from modules.risk_matrix import MAX_ROWS, ORDERINGS, downsample, risk_matrix, row_order
+from modules.phase_transitions import alignment_version
+from modules.phase_store import PHASES, phase_frame, phase_version, learner_bitmaps, show_bitmap_filters, to_mask, value_counts
 
 def show(df_original, theme='Light'):
     """Display the overview phase selection page with dynamic data loading"""
@@ -39,14 +46,29 @@ def show(df_original, theme='Light'):
     )
 
     # Calculate global metrics for the selected phase
-    df_current_phase = load_test_predictions(selected_phase)
-    
+    df_current_phase = phase_frame(selected_phase, phase_version(selected_phase))
+
+    # Bộ lọc bitmap: thẻ số liệu và biểu đồ tròn chỉ tính trên học viên phù hợp
+    bitmaps = learner_bitmaps(selected_phase, phase_version(selected_phase))
+    filter_bits = show_bitmap_filters(bitmaps, f"overview_f{selected_phase}")
+    row_mask = None if filter_bits is None else to_mask(filter_bits, bitmaps["n"])
+
     # Column names based on phase
     video_col = f"num_videos_P{selected_phase}"
     attempt_col = f"n_attempts_P{selected_phase}"
-    
-    total_videos = int(df_current_phase[video_col].sum()) if video_col in df_current_phase.columns else 0
-    total_attempts = int(df_current_phase[attempt_col].sum()) if attempt_col in df_current_phase.columns else 0
+
+    cube = learner_cube(cube_version())
+
+    def _column_total(col):
+        if col not in df_current_phase.columns:
+            return 0
+        if row_mask is None:
+            # không lọc -> tổng đã có sẵn trong cube
+            return int(query(cube, where={"phase": selected_phase}, measures=[col])[col].sum())
+        return int(df_current_phase[col].to_numpy()[row_mask].sum())
+
+    total_videos = _column_total(video_col)
+    total_attempts = _column_total(attempt_col)
 
     # Calculate static global metrics (independent of phase)
     df_courses = load_courses()
@@ -115,21 +137,24 @@ def show(df_original, theme='Light'):
         """, unsafe_allow_html=True)
 
     phases, counts, colors, names = [], [], [], []
-    
-    for p in range(1, selected_phase + 1):
-        df_phase = load_test_predictions(p)
+    # Số bỏ học theo giai đoạn: một lần roll-up của cube cho mỗi cột
+    shown = list(range(1, selected_phase + 1))
+    by_label = query(cube, by=["phase"], where={"phase": shown, "label": "1"}).set_index("phase")["count"]
+    by_predict = query(cube, by=["phase"], where={"phase": selected_phase, "predict": "1"}).set_index("phase")["count"]
+
+    for p in shown:
         phase_label = f'Giai đoạn {p}'
         
         if p < selected_phase:
             # For previous phases, use 'label' column (1 = dropout)
-            count = (df_phase['label'] == 1).sum() if 'label' in df_phase.columns else 0
+            count = int(by_label.get(p, 0))
             phases.append(phase_label)
             counts.append(count)
             colors.append('#4299e1') # Blue for Label
             names.append('Nhãn thực tế')
         else:
             # For the current selected phase, use 'predict' column (1 = dropout)
-            count = (df_phase['predict'] == 1).sum() if 'predict' in df_phase.columns else 0
+            count = int(by_predict.get(p, 0))
             phases.append(phase_label)
             counts.append(count)
             colors.append('#ed8936') # Orange for Prediction
@@ -193,10 +218,13 @@ def show(df_original, theme='Light'):
     # ---------------------------------------------------------
     st.markdown("<br><br>", unsafe_allow_html=True)
     
-    if not df_current_phase.empty and "predict" in df_current_phase.columns:
-        dropout_counts = df_current_phase["predict"].value_counts().reset_index()
-        dropout_counts.columns = ["Trạng thái", "Số lượng"]
-        dropout_counts["Trạng thái"] = dropout_counts["Trạng thái"].map({0: "Không bỏ học", 1: "Bỏ học"})
+    if not df_current_phase.empty and "predict" in bitmaps["bits"]:
+        # Đếm trực tiếp trên bitmap (popcount), không cần value_counts
+        dropout_counts = pd.DataFrame({
+            "Trạng thái": ["Không bỏ học", "Bỏ học"],
+            "Số lượng": value_counts(bitmaps, "predict", filter_bits),
+        })
+        dropout_counts = dropout_counts[dropout_counts["Số lượng"] > 0]
 
         fig_pie = px.pie(
             dropout_counts, 
@@ -229,3 +257,105 @@ def show(df_original, theme='Light'):
         st.plotly_chart(fig_pie, use_container_width=True)
     else:
         st.info(f"Không có dữ liệu dự đoán cho giai đoạn {selected_phase}.")
+
+    _show_risk_heatmap(cube, bg_color, text_color)
+    _show_engagement_funnel(selected_phase, bg_color, text_color, theme)
+
+
+def _show_risk_heatmap(cube, bg_color, text_color):
+    """Heatmap tỷ lệ bỏ học dự đoán: mọi khóa học (hàng) x giai đoạn 1-5 (cột)."""
+    st.markdown("---")
+    st.markdown('<p style="font-size: 28px; font-weight: bold;">Bản đồ rủi ro bỏ học theo khóa học và giai đoạn</p>', unsafe_allow_html=True)
+
+    version = cube_version()
+    matrix = risk_matrix(cube, version)
+    k = len(matrix["courses"])
+    if not k:
+        st.info("Không có dữ liệu dự đoán để vẽ bản đồ rủi ro.")
+        return
+
+    col_order, col_rows = st.columns([1, 2])
+    with col_order:
+        ordering = st.radio("Sắp xếp hàng theo", list(ORDERINGS), format_func=ORDERINGS.get, key="risk_order", horizontal=True)
+    with col_rows:
+        # "Phóng to" phía server: chọn một đoạn thứ hạng, gộp lại tối đa MAX_ROWS hàng
+        window = st.slider("Vùng hiển thị (thứ hạng khóa học)", 1, k, (1, k), key="risk_window") if k > 1 else (1, 1)
+    rows = row_order(matrix, version, ordering)[window[0] - 1:window[1]]
+    view = downsample(matrix, rows, MAX_ROWS)
+
+    fig = go.Figure(go.Heatmap(
+        z=view["rate"] * 100,
+        x=[f"Giai đoạn {p}" for p in PHASES],
+        y=view["labels"],
+        customdata=np.dstack([view["n"], np.repeat(view["size"][:, None], len(PHASES), axis=1)]),
+        colorscale="RdYlGn_r",
+        zmin=0,
+        zmax=100,
+        colorbar=dict(title="%"),
+        hovertemplate="%{y}<br>%{x}: %{z:.1f}%<br>Học viên: %{customdata[0]:,}<br>Số khóa học: %{customdata[1]}<extra></extra>",
+    ))
+    fig.update_layout(
+        paper_bgcolor=bg_color,
+        plot_bgcolor=bg_color,
+        font=dict(color=text_color),
+        yaxis=dict(autorange="reversed", showticklabels=len(view["labels"]) <= 60),
+        height=min(900, 200 + 12 * len(view["labels"])),
+        margin=dict(l=20, r=20, t=30, b=40),
+    )
+    st.plotly_chart(fig, use_container_width=True, theme=None)
+    if len(rows) > len(view["labels"]):
+        st.caption(f"{len(rows):,} khóa học được gộp thành {len(view['labels'])} hàng (tỷ lệ gộp theo số học viên); thu hẹp vùng hiển thị để xem từng khóa học.")
+
+
+def _show_engagement_funnel(selected_phase, bg_color, text_color, theme):
+    """Phễu tham gia toàn bộ khóa học qua các giai đoạn + so sánh giữa các khóa học."""
+    st.markdown("---")
+    st.markdown('<p style="font-size: 28px; font-weight: bold;">Phễu tham gia: đăng ký → video → bài tập → bình luận</p>', unsafe_allow_html=True)
+
+    funnel = engagement_funnel(alignment_version())
+    if not funnel["phases"]:
+        st.info("Không có dữ liệu hoạt động theo giai đoạn.")
+        return
+    stage_labels = [label for label, _ in STAGES]
+    shown = [p for p in funnel["phases"] if p <= selected_phase]
+
+    fig = go.Figure()
+    for p in shown:
+        fig.add_trace(go.Funnel(
+            name=f"Giai đoạn {p}",
+            y=stage_labels,
+            x=funnel["reach"][funnel["phases"].index(p)].sum(axis=0),
+            textinfo="percent initial",
+        ))
+    fig.update_layout(
+        paper_bgcolor=bg_color,
+        plot_bgcolor=bg_color,
+        font=dict(color=text_color, size=16),
+        legend=dict(font=dict(color=text_color)),
+        height=420,
+        margin=dict(l=20, r=20, t=20, b=20),
+    )
+    st.plotly_chart(fig, use_container_width=True, theme=None)
+
+    # So sánh khóa học ở giai đoạn đang chọn: tỷ lệ đạt từng bước
+    if selected_phase not in funnel["phases"]:
+        return
+    reach = funnel["reach"][funnel["phases"].index(selected_phase)]
+    keep = reach[:, 0] > 0
+    rates = reach[keep, 1:] / reach[keep, :1]
+    df_rates = pd.DataFrame(rates, columns=stage_labels[1:])
+    df_rates.insert(0, "Học viên", reach[keep, 0])
+    df_rates.insert(0, "link", [f"?page=dashboard&course_id={quote(str(c))}&theme={theme}" for c in funnel["courses"][keep]])
+    df_rates = df_rates.sort_values(stage_labels[-2], kind="stable")
+    st.dataframe(
+        df_rates,
+        use_container_width=True,
+        hide_index=True,
+        height=360,
+        column_config={
+            "link": st.column_config.LinkColumn("Mã khóa học", display_text=r"course_id=([^&]+)"),
+            "Học viên": st.column_config.NumberColumn("Học viên", format="%d"),
+            **{label: st.column_config.ProgressColumn(label, min_value=0.0, max_value=1.0, format="%.2f") for label in stage_labels[1:]},
+        },
+    )
+    st.caption(f"Tỷ lệ học viên đạt từng bước ở giai đoạn {selected_phase}; khóa học có tỷ lệ làm bài tập thấp nhất ở trên cùng.")
@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+from urllib.parse import quote
+
+from modules.leaderboard import cube_course_counts
+from modules.olap_cube import cube_version, learner_cube
+from modules.phase_store import PHASES
+from modules.school_rollup import ENGAGEMENT, school_summary
+
+# Nhãn hiển thị -> (cột sắp xếp, giảm dần)
+SCHOOL_SORT_OPTIONS = {
+    "Số học viên": ("learners", True),
+    "Tỷ lệ bỏ học": ("dropout_rate", True),
+    "Tỷ lệ bỏ học dự đoán": ("predicted_rate", True),
+    "Số khóa học": ("courses", True),
+    "Tên trường": ("school", False),
+}
+CHART_MAX = 20
+
+
+def _course_link(course_id, theme: str) -> str:
+    return f"?page=dashboard&course_id={quote(str(course_id))}&theme={theme}"
+
+
+def _show_school_detail(cube: dict, version: str, df_schools: pd.DataFrame, school: str, theme: str, colors: dict) -> None:
+    row = df_schools.loc[df_schools["school"] == school].iloc[0]
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Khóa học", f"{row['courses']:,}")
+    col2.metric("Học viên (huấn luyện)", f"{row['learners']:,}")
+    col3.metric("Tỷ lệ bỏ học", "-" if pd.isna(row["dropout_rate"]) else f"{row['dropout_rate']:.1%}")
+    col4.metric("Tỷ lệ bỏ học dự đoán (P5)", "-" if pd.isna(row["predicted_rate"]) else f"{row['predicted_rate']:.1%}")
+
+    # Hành vi theo giai đoạn: trường đang chọn so với trung bình toàn bộ
+    weights = df_schools["learners"].to_numpy()
+    fig = go.Figure()
+    for (col, label), color in zip(ENGAGEMENT.items(), ("#4299e1", "#48bb78", "#ed8936")):
+        cols = [f"{col}_P{p}" for p in PHASES]
+        overall = (df_schools[cols].fillna(0).to_numpy() * weights[:, None]).sum(axis=0) / max(weights.sum(), 1)
+        fig.add_trace(go.Scatter(x=[f"P{p}" for p in PHASES], y=row[cols].to_numpy(dtype=float), name=label, mode="lines+markers", line=dict(color=color, width=3)))
+        fig.add_trace(go.Scatter(x=[f"P{p}" for p in PHASES], y=overall, name=f"{label} (tất cả trường)", mode="lines", line=dict(color=color, dash="dot")))
+    fig.update_layout(
+        title=dict(text="<b>Mức độ tham gia trung bình mỗi học viên theo giai đoạn</b>", font=dict(size=20, color=colors["text"])),
+        paper_bgcolor=colors["bg"],
+        plot_bgcolor=colors["bg"],
+        font=dict(color=colors["text"]),
+        yaxis_title="Lượt / học viên",
+        hovermode="x unified",
+        height=420,
+    )
+    fig.update_xaxes(gridcolor=colors["grid"])
+    fig.update_yaxes(gridcolor=colors["grid"])
+    st.plotly_chart(fig, use_container_width=True, theme=None)
+
+    # Khóa học của trường: lọc theo mã trường, không quét bảng học viên
+    counts = cube_course_counts(cube, version, 0)
+    course_codes = pd.Index(cube["labels"]["course"]).get_indexer(counts["course_id"])
+    school_code = cube["labels"]["school"].index(school)
+    rows = np.flatnonzero(cube["course_school"][course_codes] == school_code)
+    if not len(rows):
+        st.info("Trường này chưa có học viên trong dữ liệu huấn luyện.")
+        return
+    rows = rows[np.argsort(-counts["n"][rows], kind="stable")]
+    df_courses = pd.DataFrame({
+        "link": [_course_link(c, theme) for c in counts["course_id"][rows]],
+        "n": counts["n"][rows],
+        "dropout_rate": counts["dropout_rate"][rows] if counts["dropout_rate"] is not None else np.nan,
+    })
+    st.dataframe(
+        df_courses,
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "link": st.column_config.LinkColumn("Mã khóa học", display_text=r"course_id=([^&]+)"),
+            "n": st.column_config.NumberColumn("Học viên", format="%d"),
+            "dropout_rate": st.column_config.ProgressColumn("Tỷ lệ bỏ học", min_value=0.0, max_value=1.0, format="%.2f"),
+        },
+    )
+
+
+def show(theme: str = "Light") -> None:
+    """Trang tổng hợp theo trường: học viên, tỷ lệ bỏ học và mức độ tham gia."""
+    if theme == "Dark":
+        colors = {"bg": "#1a202c", "text": "#ffffff", "grid": "#2d3748"}
+    else:
+        colors = {"bg": "#ffffff", "text": "#1a202c", "grid": "#e2e8f0"}
+
+    st.title("🏫 Trường học")
+    version = cube_version()
+    cube = learner_cube(version)
+    df_schools = school_summary(cube, version)
+    if df_schools.empty:
+        st.info("Không có dữ liệu trường học.")
+        return
+
+    col_sort, col_dir = st.columns([3, 1])
+    with col_sort:
+        sort_label = st.selectbox("Sắp xếp theo", list(SCHOOL_SORT_OPTIONS), key="school_sort")
+    column, descending = SCHOOL_SORT_OPTIONS[sort_label]
+    with col_dir:
+        descending = st.radio(
+            "Thứ tự", ["Giảm dần", "Tăng dần"], index=0 if descending else 1, key=f"school_sort_dir_{column}", horizontal=True
+        ) == "Giảm dần"
+    df_sorted = df_schools.sort_values(column, ascending=not descending, na_position="last", kind="stable")
+
+    # Biểu đồ: các trường đầu bảng, số học viên + tỷ lệ bỏ học
+    top = df_sorted.head(CHART_MAX)
+    fig = go.Figure()
+    fig.add_trace(go.Bar(x=top["school"], y=top["learners"], name="Học viên", marker_color="#4299e1"))
+    fig.add_trace(go.Scatter(x=top["school"], y=top["dropout_rate"] * 100, name="Tỷ lệ bỏ học (%)", yaxis="y2", mode="markers", marker=dict(color="#f56565", size=10)))
+    fig.add_trace(go.Scatter(x=top["school"], y=top["predicted_rate"] * 100, name="Tỷ lệ bỏ học dự đoán (%)", yaxis="y2", mode="markers", marker=dict(color="#ed8936", size=10, symbol="diamond")))
+    fig.update_layout(
+        title=dict(text=f"<b>{len(top)} trường đầu theo “{sort_label}”</b>", font=dict(size=20, color=colors["text"])),
+        paper_bgcolor=colors["bg"],
+        plot_bgcolor=colors["bg"],
+        font=dict(color=colors["text"]),
+        yaxis=dict(title="Học viên", gridcolor=colors["grid"]),
+        yaxis2=dict(title="%", overlaying="y", side="right", range=[0, 100], showgrid=False),
+        legend=dict(orientation="h", y=-0.35),
+        height=480,
+    )
+    st.plotly_chart(fig, use_container_width=True, theme=None)
+
+    st.dataframe(
+        df_sorted[["school", "courses", "learners", "dropout_rate", "test_learners", "predicted_rate"]],
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "school": "Trường",
+            "courses": st.column_config.NumberColumn("Khóa học", format="%d"),
+            "learners": st.column_config.NumberColumn("Học viên", format="%d"),
+            "dropout_rate": st.column_config.ProgressColumn("Tỷ lệ bỏ học", min_value=0.0, max_value=1.0, format="%.2f"),
+            "test_learners": st.column_config.NumberColumn("Học viên (P5)", format="%d"),
+            "predicted_rate": st.column_config.ProgressColumn("Tỷ lệ bỏ học dự đoán", min_value=0.0, max_value=1.0, format="%.2f"),
+        },
+    )
+    st.caption(f"{len(df_schools):,} trường · tỷ lệ bỏ học theo nhãn huấn luyện, tỷ lệ dự đoán theo giai đoạn {PHASES[-1]}.")
+
+    st.markdown("---")
+    school = st.selectbox("Chi tiết trường", df_sorted["school"].tolist(), key="school_pick")
+    if school is not None:
+        _show_school_detail(cube, version, df_schools, school, theme, colors)
@@ -1,9 +1,26 @@
+import numpy as np
 import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from urllib.parse import quote  # ✅ thêm để encode user_id/course_id an toàn
-from modules.data_loader import load_users, load_courses
+from modules.data_loader import load_courses, dataset_version, USERS_PATH
+from modules.learner_index import PERCENTILE_COLS, course_percentiles, course_prefix_index, course_sort_orders, prefix_search, suggest, users_frame
+from modules.pagination import paginate
+from modules.phase_store import learner_bitmaps, phase_version, rows_to_bits, show_bitmap_filters, to_mask
+from modules.similar_learners import N_SIMILAR, course_tree, feature_matrix, global_tree, similar
+
+# Nhãn hiển thị -> cột sắp xếp (xem learner_index.SORT_KEYS)
+USER_SORT_OPTIONS = {
+    "Mặc định": None,
+    "Nguy cơ bỏ học": "predict",
+    "Ngày đăng ký": "enroll_time",
+    "Số video (P5)": "num_videos_P5",
+    "Số lần làm bài (P5)": "n_attempts_P5",
+    "Số ngày hoạt động (P5)": "num_active_days_P5",
+}
+# Thuộc tính lọc của danh sách học viên (chứng chỉ là hằng số trong 1 khóa học)
+USER_FILTER_ATTRS = ("label", "predict", "enroll_month", "activity")
 
 
 def _theme_tokens():
@@ -23,6 +40,21 @@ def _theme_tokens():
     }
 
 
+def _top_percent(rank: float) -> int:
+    # làm tròn lên để "top 1%" luôn bao gồm học viên đứng đầu
+    return max(1, int(np.ceil(rank * 100)))
+
+
+def _top_badge(ranks: pd.Series, col: str) -> str:
+    """Dòng "top X% khóa học" dưới thẻ số liệu; rỗng khi không có thứ hạng."""
+    rank = ranks.get(col)
+    if rank is None or pd.isna(rank):
+        return ""
+    if rank > 0.5:
+        return "<div style='font-size: 15px; opacity: 0.6; margin-top: 4px;'>Nửa dưới khóa học</div>"
+    return f"<div style='font-size: 15px; font-weight: 600; color: #38a169; margin-top: 4px;'>🏅 Top {_top_percent(rank)}% khóa học</div>"
+
+
 def display_user_dashboard(USER_ID: str):
     """Hiển thị giao diện chi tiết của học viên."""
     tok = _theme_tokens()
@@ -56,7 +88,7 @@ def display_user_dashboard(USER_ID: str):
     st.markdown("---")
 
     try:
-        df_users = load_users()
+        df_users = users_frame(dataset_version(USERS_PATH))
         df_courses = load_courses()
 
         COURSE_ID = st.session_state.selected_course_id
@@ -72,6 +104,9 @@ def display_user_dashboard(USER_ID: str):
             return
 
         user = user_data.iloc[0]
+        # Thứ hạng trong khóa học, tính sẵn cho mọi học viên (cùng chỉ mục dòng với load_users())
+        percentiles = course_percentiles(dataset_version(USERS_PATH))
+        ranks = percentiles.loc[user_data.index[0]] if user_data.index[0] in percentiles.index else pd.Series(dtype=float)
         enroll_time_formatted = pd.to_datetime(user.get("enroll_time", None), errors="coerce")
         enroll_time_formatted = enroll_time_formatted.strftime("%d/%m/%Y") if not pd.isna(enroll_time_formatted) else "-"
 
@@ -106,6 +141,7 @@ def display_user_dashboard(USER_ID: str):
             <div class='metric-label'>Video</div>
             <div class='metric-value'>{num_videos}</div>
             <div style='font-size: 18px; color: {text_color}; opacity: 0.8; margin-top: 8px;'>Đã xem</div>
+            {_top_badge(ranks, "num_videos_P5")}
         </div>
         """,
             unsafe_allow_html=True,
@@ -119,6 +155,7 @@ def display_user_dashboard(USER_ID: str):
             <div class='metric-label'>Comment</div>
             <div class='metric-value'>{n_comments}</div>
             <div style='font-size: 18px; color: {text_color}; opacity: 0.8; margin-top: 8px;'>Số bình luận</div>
+            {_top_badge(ranks, "n_comments_P5")}
         </div>
         """,
             unsafe_allow_html=True,
@@ -132,6 +169,7 @@ def display_user_dashboard(USER_ID: str):
             <div class='metric-label'>Problem</div>
             <div class='metric-value'>{n_attempts}</div>
             <div style='font-size: 18px; color: {text_color}; opacity: 0.8; margin-top: 8px;'>Đã làm</div>
+            {_top_badge(ranks, "n_attempts_P5")}
         </div>
         """,
             unsafe_allow_html=True,
@@ -228,6 +266,8 @@ def display_user_dashboard(USER_ID: str):
                 margin=dict(l=60, r=20, t=100, b=60), # Added more padding
             )
             st.plotly_chart(fig, use_container_width=True, theme=None)
+            if pd.notna(ranks.get("accuracy_rate_P5")) and ranks["accuracy_rate_P5"] <= 0.5:
+                st.caption(f"🏅 Top {_top_percent(ranks['accuracy_rate_P5'])}% khóa học về {PERCENTILE_COLS['accuracy_rate_P5']}")
 
     with col_chart_right:
         with st.container(border=True):
@@ -405,6 +445,50 @@ def display_user_dashboard(USER_ID: str):
         unsafe_allow_html=True,
     )
 
+    _show_similar_learners(user_data.index[0], COURSE_ID)
+
+
+def _show_similar_learners(row: int, COURSE_ID: str):
+    """20 học viên có hành vi P1–P5 gần nhất (KD-tree), trong khóa học hoặc toàn bộ."""
+    st.markdown("---")
+    st.markdown("<h2 style='font-size: 32px; font-weight: 700;'>Học viên tương tự</h2>", unsafe_allow_html=True)
+
+    version = dataset_version(USERS_PATH)
+    features = feature_matrix(version)
+    if not features["cols"]:
+        st.info("Không có cột hành vi để so sánh học viên.")
+        return
+    scope = st.radio("Phạm vi", ["Trong khóa học", "Toàn bộ khóa học"], key="similar_scope", horizontal=True)
+    index = course_tree(str(COURSE_ID), version) if scope == "Trong khóa học" else global_tree(version)
+    rows, dist = similar(index, features["X"], row, N_SIMILAR)
+    if not len(rows):
+        st.info("Không có học viên nào khác để so sánh.")
+        return
+
+    df_users = users_frame(version)
+    theme = st.session_state.get("theme", "Light")
+    cols = [c for c in ["course_id", "predict", "num_videos_P5", "n_attempts_P5", "num_active_days_P5"] if c in df_users.columns]
+    df_show = df_users.iloc[rows][["user_id", *cols]].assign(distance=dist)
+    df_show.insert(0, "link", [
+        f"?page=dashboard&course_id={quote(str(c))}&user_id={quote(str(u))}&theme={theme}"
+        for u, c in zip(df_show["user_id"], df_show["course_id"])
+    ])
+    st.dataframe(
+        df_show.drop(columns="user_id"),
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "link": st.column_config.LinkColumn("Học viên", display_text=r"user_id=([^&]+)"),
+            "course_id": "Khóa học",
+            "predict": st.column_config.CheckboxColumn("Dự đoán bỏ học"),
+            "num_videos_P5": st.column_config.NumberColumn("Video (P5)", format="%d"),
+            "n_attempts_P5": st.column_config.NumberColumn("Bài tập (P5)", format="%d"),
+            "num_active_days_P5": st.column_config.NumberColumn("Ngày hoạt động (P5)", format="%d"),
+            "distance": st.column_config.NumberColumn("Khoảng cách", format="%.2f"),
+        },
+    )
+    st.caption(f"Khoảng cách Euclid trên {len(features['cols'])} đặc trưng hành vi P1–P5 đã chuẩn hóa (z-score).")
+
 
 # =========================
 # ✅ ROUTING FIX HERE
@@ -459,37 +543,68 @@ def display_user_list(COURSE_ID):
         st.session_state.last_course_id = COURSE_ID
 
     try:
-        df_users = load_users()
-        df_filtered_users = df_users[df_users["course_id"] == COURSE_ID].copy()
-        if "enroll_time" in df_filtered_users.columns:
-            df_filtered_users["enroll_time"] = pd.to_datetime(df_filtered_users["enroll_time"], errors="coerce").dt.strftime("%d/%m/%Y")
+        # Bảng P5 dùng chung (không sao chép); chỉ gather các dòng của trang hiện tại
+        df_users = users_frame(dataset_version(USERS_PATH))
+        index = course_prefix_index(str(COURSE_ID), dataset_version(USERS_PATH))
     except Exception as e:
         st.error(f"Lỗi khi đọc dữ liệu user: {e}")
         return
 
     st.header("Danh sách học viên")
-    total_users = len(df_filtered_users)
+    total_users = len(index["rows"])
     st.markdown(f"Quản lý và xem tất cả người dùng hệ thống ({total_users} học viên)")
 
-    search_user = st.text_input("🔍 Tìm kiếm bằng ID ...", placeholder="Tìm kiếm bằng ID ...")
+    col_search, col_sort, col_dir = st.columns([3, 1.2, 0.8])
+    with col_search:
+        search_user = st.text_input("🔍 Tìm kiếm bằng ID ...", placeholder="Tìm kiếm bằng ID ...").strip()
+    with col_sort:
+        sort_label = st.selectbox("Sắp xếp theo", list(USER_SORT_OPTIONS), key="user_sort")
+    with col_dir:
+        descending = st.radio("Thứ tự", ["Giảm dần", "Tăng dần"], key="user_sort_dir", horizontal=True) == "Giảm dần"
+
+    # Bộ lọc bitmap trên bảng P5 (cùng vị trí dòng với load_users()), đếm trong khóa học này
+    bitmaps = learner_bitmaps(5, phase_version(5))
+    filter_bits = None
+    if bitmaps["n"] == len(df_users):
+        filter_bits = show_bitmap_filters(
+            bitmaps, "user_f", attrs=USER_FILTER_ATTRS, base=rows_to_bits(index["rows"], bitmaps["n"])
+        )
 
-    if search_user:
+    # Chỉ quay về trang 1 khi từ khóa, thứ tự hoặc bộ lọc thay đổi
+    list_state = (search_user, sort_label, descending, tuple(tuple(st.session_state.get(f"user_f_{a}", [])) for a in USER_FILTER_ATTRS))
+    if st.session_state.get("user_list_state") != list_state:
         st.session_state.user_page = 1
-        df_display = df_filtered_users[df_filtered_users["user_id"].astype(str).str.contains(search_user, case=False, na=False)]
-    else:
-        df_display = df_filtered_users.copy()
+        st.session_state.user_list_state = list_state
 
-    PAGE_SIZE = 10
-    total_display_users = len(df_display)
-    total_pages = (total_display_users + PAGE_SIZE - 1) // PAGE_SIZE
-    if total_pages == 0:
-        total_pages = 1
+    if search_user:
+        rows = prefix_search(index, search_user)
+        suggestions = suggest(index, search_user)
+        if suggestions and len(rows) > 1:
+            st.caption("Gợi ý:")
+            cols = st.columns(len(suggestions))
+            for col, uid in zip(cols, suggestions):
+                with col:
+                    st.button(uid, key=f"user_suggest_{uid}", on_click=navigate_to_user_detail, args=(uid,))
+    else:
+        rows = index["rows"]
 
-    st.session_state.user_page = max(1, min(st.session_state.user_page, total_pages))
+    # Hoán vị sắp xếp được tính sẵn 1 lần / khóa học; ở đây chỉ còn gather
+    sorted_rows = course_sort_orders(str(COURSE_ID), dataset_version(USERS_PATH)).get((USER_SORT_OPTIONS[sort_label], descending))
+    if sorted_rows is not None:
+        rows = sorted_rows[np.isin(sorted_rows, rows, assume_unique=True)] if search_user else sorted_rows
+    if filter_bits is not None:
+        rows = rows[to_mask(filter_bits, bitmaps["n"])[rows]]
 
-    start_index = (st.session_state.user_page - 1) * PAGE_SIZE
-    end_index = start_index + PAGE_SIZE
-    users_on_page = df_display.iloc[start_index:end_index]
+    PAGE_SIZE = 10
+    page = paginate(rows, st.session_state.user_page, PAGE_SIZE)
+    st.session_state.user_page = page["page"]
+    total_pages = page["total_pages"]
+    total_display_users = page["total"]
+
+    # Chỉ lấy và định dạng các dòng của trang hiện tại
+    users_on_page = df_users.iloc[page["rows"]].copy()
+    if "enroll_time" in users_on_page.columns:
+        users_on_page["enroll_time"] = pd.to_datetime(users_on_page["enroll_time"], errors="coerce").dt.strftime("%d/%m/%Y")
 
     st.markdown("---")
 
@@ -0,0 +1,21 @@
+import pandas as pd
+
+from modules.bootstrap import file_bootstrap_ci
+
+
+def test_by_course_skips_null_course_ids(tmp_path):
+    path = tmp_path / "p.csv"
+    pd.DataFrame(
+        [(1, "C1", 1, 1), (2, "C1", 0, 0), (3, None, 1, 0), (4, "C2", 0, 1), (5, "C2", 1, 1), (6, "C2", 0, 0)],
+        columns=["user_id", "course_id", "label", "predict"],
+    ).to_csv(path, index=False)
+    df_ci = file_bootstrap_ci(str(path), "a", by_course=True, n_boot=20)
+    assert df_ci["group"].tolist() == ["C1", "C2"]
+    assert df_ci["n"].tolist() == [2, 3]
+    assert df_ci["acc"].tolist() == [1.0, 2 / 3]
+
+
+def test_by_course_without_course_ids(tmp_path):
+    path = tmp_path / "p.csv"
+    pd.DataFrame({"user_id": [1, 2], "course_id": [None, None], "label": [0, 1], "predict": [0, 1]}).to_csv(path, index=False)
+    assert file_bootstrap_ci(str(path), "b", by_course=True, n_boot=20).empty
@@ -0,0 +1,23 @@
+import pandas as pd
+
+from modules.model_metrics import course_breakdown
+
+
+def _write(tmp_path, name, rows):
+    path = tmp_path / name
+    pd.DataFrame(rows, columns=["user_id", "course_id", "label", "predict"]).to_csv(path, index=False)
+    return str(path)
+
+
+def test_course_breakdown_all_phases(tmp_path):
+    p1 = _write(tmp_path, "p1.csv", [(1, "C1", 1, 1), (2, "C1", 0, 1), (3, None, 1, 0), (4, "C2", 0, 0)])
+    p2 = _write(tmp_path, "p2.csv", [(1, "C3", 1, 0), (2, "C1", 1, 1)])
+    out = course_breakdown({2: (p2, "b"), 1: (p1, "a")})
+
+    got = {(r.phase, r.course_id): (r.n, r.acc) for r in out.itertuples()}
+    assert got == {
+        (1, "C1"): (2, 0.5),
+        (1, "C2"): (1, 1.0),
+        (2, "C1"): (1, 1.0),
+        (2, "C3"): (1, 0.0),
+    }
@@ -0,0 +1,43 @@
+import pandas as pd
+
+from modules.olap_cube import build_cube, query
+
+COURSES = pd.DataFrame({"course_id": ["A", "B", "C"], "school_name": ["S1", "S1", "S2"]})
+
+
+def _cube():
+    frames = {
+        0: pd.DataFrame({
+            "course_id": ["A", "A", "B", "C", "C", "C"],
+            "enroll_time": ["2020-01-05", "2020-02-01", "2020-01-20", None, "2021-03-03", "2021-03-04"],
+            "label": [1, 0, 1, 0, None, 1],
+        }),
+        1: pd.DataFrame({"course_id": ["A", "C"], "label": [1, 1], "predict": [0, 1]}),
+    }
+    return build_cube(frames, COURSES)
+
+
+def test_rollup_matches_groupby():
+    df = query(_cube(), by=["school", "course", "month"], where={"phase": 0})
+    got = {(r.school, r.course, r.month): r.count for r in df.itertuples()}
+    assert got == {
+        ("S1", "A", "2020-01"): 1,
+        ("S1", "A", "2020-02"): 1,
+        ("S1", "B", "2020-01"): 1,
+        ("S2", "C", "2021-03"): 2,
+        ("S2", "C", "N/A"): 1,
+    }
+
+
+def test_empty_slice():
+    cube = _cube()
+    assert query(cube, by=["course"], where={"phase": 9}).empty
+    assert query(cube, where={"phase": 9})["count"].tolist() == [0]
+    assert query(cube, where={"label": ["0", "1"]})["count"].tolist() == [7]
+
+
+def test_missing_course_ids_share_na_code():
+    frames = {0: pd.DataFrame({"course_id": ["A", None, "B", float("nan")], "label": [1, 0, 0, 1]})}
+    df = query(build_cube(frames, COURSES), by=["school", "course"])
+    got = {(r.school, r.course): r.count for r in df.itertuples()}
+    assert got == {("S1", "A"): 1, ("S1", "B"): 1, ("N/A", "N/A"): 2}
@@ -0,0 +1,79 @@
+import pytest
+
+from modules.search_index import build_ngram_index, search
+
+CATALOG = [
+    "C_584313 Giải tích 1",
+    "C_123456 Machine Learning",
+    "C_999 数据结构",
+    "C_777 Lập trình Python",
+]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return build_ngram_index(CATALOG)
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("C_58", 0),
+    ("c_5843", 0),
+    ("5843", 0),
+    ("123", 1),
+    ("C_777", 3),
+])
+def test_id_prefix(index, query, expected):
+    assert search(index, query).tolist()[:1] == [expected]
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("ma", 1),
+    ("py", 3),
+    ("mach", 1),
+    ("数据", 2),
+    ("giai tich", 0),
+    ("lap trinh", 3),
+])
+def test_short_substring(index, query, expected):
+    assert search(index, query).tolist()[:1] == [expected]
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("machne lerning", 1),
+    ("machine lerning", 1),
+    ("pythen", 3),
+    ("giai tuch", 0),
+])
+def test_one_character_typo(index, query, expected):
+    assert search(index, query).tolist()[:1] == [expected]
+
+
+def test_no_match(index):
+    assert search(index, "xyz").tolist() == []
+    assert search(index, "   ").tolist() == []
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("U_61", [0, 1]),
+    ("6186", [0]),
+    ("pek", [3]),
+    ("tsinghua univ", [4]),
+])
+def test_global_partial_ids(query, expected):
+    from modules.tim_kiem import GLOBAL_MIN_MATCH
+
+    index = build_ngram_index(["U_6186", "U_618", "U_12", "Peking University", "Tsinghua University"])
+    assert search(index, query, min_match=GLOBAL_MIN_MATCH, strict=False).tolist()[:len(expected)] == expected
+
+
+def test_course_search_precision():
+    # nhiễu chia sẻ một nửa trigram của truy vấn ("giai", "tich", "dich"...)
+    catalog = [
+        "C_1 Giải tích 1", "C_2 Giải tích 2", "C_3 Tích phân", "C_4 Giai thoại",
+        "C_5 Gia đình học", "C_6 Giải bài tập", "C_7 Dịch thuật", "C_8 Phân tích dữ liệu",
+    ]
+    index = build_ngram_index(catalog)
+    assert sorted(search(index, "giai tich").tolist()) == [0, 1]
+    assert sorted(search(index, "tich").tolist()) == [0, 1, 2, 7]
+    # ô tìm kiếm toàn cục vẫn giữ phần đuôi gần đúng
+    assert len(search(index, "giai tich", min_match=0.4, strict=False)) > 2